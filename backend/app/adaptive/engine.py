@@ -2,14 +2,15 @@
 Adaptive difficulty engine.
 Determines when to increase/decrease task difficulty.
 """
+from dataclasses import dataclass
 from typing import Literal
-from pydantic import BaseModel
 
 DifficultyLevel = Literal["easy", "medium", "middle", "hard"]
 
 
-class TaskResult(BaseModel):
-    """Result of a single task attempt."""
+@dataclass(slots=True, frozen=True)
+class TaskResult:
+    """Result of a single task attempt (built once per task when grading)."""
     difficulty: DifficultyLevel
     visible_passed: int
     visible_total: int
@@ -107,18 +108,21 @@ def update_level_after_task(
     return current_level
 
 
+# Difficulty weights
+DIFFICULTY_WEIGHTS = {
+    "easy": 1.0,
+    "middle": 2.0,
+    "hard": 3.0,
+}
+
+
 def calculate_task_score(result: TaskResult) -> float:
     """
     Calculate weighted score for a single task.
     
     Returns score in "conditional units" (0.0 to difficulty_weight).
     """
-    # Difficulty weights
-    difficulty_weight = {
-        "easy": 1.0,
-        "middle": 2.0,
-        "hard": 3.0,
-    }[result.difficulty]
+    difficulty_weight = DIFFICULTY_WEIGHTS[result.difficulty]
     
     # Pass rates
     visible_rate = result.visible_passed / max(1, result.visible_total)
@@ -154,12 +158,12 @@ def calculate_coding_score(results: list[TaskResult]) -> float:
     if not results:
         return 0.0
     
-    total_score = sum(calculate_task_score(r) for r in results)
-    total_weight = sum({
-        "easy": 1.0,
-        "middle": 2.0,
-        "hard": 3.0,
-    }[r.difficulty] for r in results)
+    # One pass accumulating both sums
+    total_score = 0.0
+    total_weight = 0.0
+    for r in results:
+        total_score += calculate_task_score(r)
+        total_weight += DIFFICULTY_WEIGHTS[r.difficulty]
     
     coding_score = (total_score / max(1, total_weight)) * 100.0
     
@@ -4,7 +4,8 @@ Main endpoints for conducting interviews.
 V2: New interview flow with 3 tasks + theory questions
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 
 from ..core.db import get_db
@@ -34,9 +35,9 @@ from ..schemas.interview import (
     TaskWithOpeningQuestion,
     InitialChatMessage
 )
-from ..services.scibox_client import scibox_client
+from ..services.scibox_client import scibox_client, strip_think_blocks, strip_think_tags
 from ..services.adaptive import generate_first_task, generate_next_task as adaptive_generate_next_task
-from ..services.code_runner import run_code
+from ..services.code_runner import public_tests, run_code
 from ..services.anti_cheat import calculate_trust_score
 from ..services.reporting import generate_final_report
 from ..services.grading_service import calculate_start_grade, calculate_final_grade_for_interview
@@ -166,9 +167,11 @@ async def submit_code(
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    # Run code against test cases
+    # Run code against test cases (blocking: off the event loop, so concurrent
+    # submissions reach separate judge workers)
     try:
-        result = run_code(
+        result = await run_in_threadpool(
+            run_code,
             code=submission_data.code,
             language=submission_data.language,
             visible_tests=task.visible_tests,
@@ -187,7 +190,7 @@ async def submit_code(
             auto_hint = await scibox_client.generate_auto_hint_on_failure(
                 task_title=task.title,
                 task_description=task.description,
-                visible_tests=task.visible_tests or [],
+                visible_tests=public_tests(task.visible_tests),
                 user_code=submission_data.code,
                 error_message=result.get("error_message", "")
             )
@@ -327,9 +330,7 @@ async def send_chat_message(
         )
         
         # Clean response - remove ALL <think> tags and their content
-        import re
-        ai_response = re.sub(r'<think>.*?</think>', '', ai_response, flags=re.DOTALL).strip()
-        ai_response = re.sub(r'</?think>', '', ai_response).strip()
+        ai_response = strip_think_tags(ai_response)
         
         if not ai_response:
             ai_response = "Интересный вопрос! Давай разберёмся вместе. 🤔"
@@ -404,8 +405,7 @@ async def request_hint(
         if next_step:
             hint_content += f"\n\n💡 Следующий шаг: {next_step}"
         
-        import re
-        hint_content = re.sub(r'<think>.*?</think>', '', hint_content, flags=re.DOTALL).strip()
+        hint_content = strip_think_blocks(hint_content).strip()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Hint generation failed: {str(e)}")
     
@@ -654,25 +654,16 @@ async def get_task_chat_messages(
     """
     Get all chat messages for a specific task (including opening question).
     """
-    import re
     messages = db.query(ChatMessage).filter(
         ChatMessage.interview_id == interview_id,
         ChatMessage.task_id == task_id
     ).order_by(ChatMessage.created_at).all()
     
-    def clean_think_tags(text: str) -> str:
-        """Remove <think> tags from text."""
-        if not text:
-            return text
-        text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL).strip()
-        text = re.sub(r'</?think>', '', text).strip()
-        return text
-    
     return [
         {
             "id": msg.id,
             "role": msg.role,
-            "content": clean_think_tags(msg.content),
+            "content": strip_think_tags(msg.content),
             "created_at": msg.created_at.isoformat()
         }
         for msg in messages
@@ -870,20 +861,12 @@ async def get_task_solution_followup(
     if not followup:
         return None
     
-    import re
-    def clean_think_tags(text: str) -> str:
-        if not text:
-            return text
-        text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL).strip()
-        text = re.sub(r'</?think>', '', text).strip()
-        return text
-    
     return {
         "followup_id": followup.id,
-        "question": clean_think_tags(followup.question_text),
+        "question": strip_think_tags(followup.question_text),
         "status": followup.status,
         "score": followup.score,
-        "feedback": clean_think_tags(followup.feedback) if followup.feedback else None,
+        "feedback": strip_think_tags(followup.feedback) if followup.feedback else None,
         "correct_answer": followup.correct_answer
     }
 
@@ -919,9 +902,10 @@ async def submit_code_with_edge_cases(
             "edge_case_results": None
         }
     
-    # Step 2: Run regular tests
+    # Step 2: Run regular tests (blocking, off the event loop)
     try:
-        result = run_code(
+        result = await run_in_threadpool(
+            run_code,
             code=submission_data.code,
             language=submission_data.language,
             visible_tests=task.visible_tests,
@@ -956,7 +940,8 @@ async def submit_code_with_edge_cases(
     edge_case_results = None
     if not edge_case_response.get("security_blocked") and edge_case_response.get("edge_case_tests"):
         try:
-            edge_case_results = run_edge_case_tests(
+            edge_case_results = await run_in_threadpool(
+                run_edge_case_tests,
                 code=submission_data.code,
                 language=submission_data.language,
                 edge_case_tests=edge_case_response["edge_case_tests"]
@@ -1210,7 +1195,10 @@ async def submit_theory_answer(
     Submit answer to a theory question.
     Returns evaluation with score and feedback.
     """
-    theory_answer = db.query(TheoryAnswer).filter(
+    # Interview joined in: evaluate_theory_answer reuses both without another query
+    theory_answer = db.query(TheoryAnswer).options(
+        joinedload(TheoryAnswer.interview)
+    ).filter(
         TheoryAnswer.id == answer_data.answer_id
     ).first()
     
@@ -1267,7 +1255,7 @@ async def get_complexity_question(task_id: int, db: Session = Depends(get_db)):
     Generate a question about time/space complexity after task is solved.
     Called automatically after successful submission.
     """
-    from ..services.complexity_checker import generate_complexity_question
+    from ..services.complexity_checker import generate_complexity_question, schedule_complexity_analysis
     
     task = db.query(Task).filter(Task.id == task_id).first()
     if not task:
@@ -1282,6 +1270,10 @@ async def get_complexity_question(task_id: int, db: Session = Depends(get_db)):
     
     candidate_code = best_submission.code if best_submission else ""
     
+    # Analyze the code while the candidate is thinking about the answer
+    if candidate_code:
+        schedule_complexity_analysis(candidate_code)
+    
     question = await generate_complexity_question(
         task_title=task.title,
         task_description=task.description,
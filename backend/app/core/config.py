@@ -32,12 +32,38 @@ class Settings(BaseSettings):
     CHAT_MODEL: str = "qwen3-32b-awq"  # 2 RPS - universal chat model
     CODER_MODEL: str = "qwen3-coder-30b-a3b-instruct-fp8"  # 2 RPS - code assistant
     EMBEDDING_MODEL: str = "bge-m3"  # 7 RPS - embeddings
+    # Smaller model for short-output intents (small talk, vacancy parsing); empty = CHAT_MODEL
+    LIGHT_MODEL: str = ""
     
     # Rate limits (requests per second)
     CHAT_MODEL_RPS: int = 2
     CODER_MODEL_RPS: int = 2
     EMBEDDING_MODEL_RPS: int = 7
     
+    # Upper bound on a single SciBox request, seconds
+    LLM_TIMEOUT_S: float = 120.0
+    # Retries of a failed request (429/5xx/timeout), exponential backoff with jitter
+    LLM_MAX_RETRIES: int = 2
+    # Circuit breaker: after this many failed requests in a row SciBox calls fail
+    # fast (callers use their fallbacks) for LLM_BREAKER_RESET_S seconds
+    LLM_BREAKER_FAIL_MAX: int = 20
+    LLM_BREAKER_RESET_S: float = 30.0
+    # Send the static system prompts once at startup so the server's prefix cache holds them
+    LLM_WARMUP_ON_STARTUP: bool = True
+    # Max intent LLM calls (call_llm_with_intent) in flight at once
+    LLM_CONCURRENCY: int = 4
+    
+    # Cache of identical chat prompts (cached_chat_completion), 0 = disabled
+    LLM_CACHE_SIZE: int = 512
+    LLM_CACHE_TTL_S: float = 600.0
+    
+    # Code runner: interpreter for judge worker subprocesses
+    # ("pypy3" recommended, empty = execute in the API process, unsandboxed)
+    CODE_RUNNER_PYTHON: str = "python3"
+    CODE_RUNNER_WORKERS: int = 2
+    CODE_RUNNER_TIMEOUT_S: float = 10.0
+    CODE_RUNNER_MEMORY_MB: int = 1024  # address space limit per worker, 0 = none
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
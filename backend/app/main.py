@@ -2,12 +2,17 @@
 VibeCode Backend - AI Interview Platform
 FastAPI application entry point.
 """
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from app.core.config import settings
 from app.core.db import init_db
+from app.services.judge_pool import get_judge_pool, shutdown_judge_pool
+from app.services.http_client import close_shared_http
+from app.services.llm_protocol import warm_up_prefix_cache
 from app.api import interview, admin, resume, anti_cheat, questions, claude, vacancy, auth, question_block
 
 # Create FastAPI app
@@ -27,6 +32,10 @@ app.add_middleware(
 )
 
 
+# Background startup work; referenced so the tasks are not garbage-collected
+_background_tasks = set()
+
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -34,6 +43,21 @@ async def startup_event():
     init_db()
     print("✅ Database initialized")
     print(f"✅ SciBox API configured: {settings.SCIBOX_BASE_URL}")
+    if get_judge_pool():
+        print(f"✅ Code runner workers started: {settings.CODE_RUNNER_WORKERS} x {settings.CODE_RUNNER_PYTHON}")
+    if settings.LLM_WARMUP_ON_STARTUP:
+        # Does not delay startup; requests racing it simply miss the prefix cache
+        task = asyncio.create_task(warm_up_prefix_cache())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop code runner workers and close pooled SciBox connections."""
+    shutdown_judge_pool()
+    await close_shared_http()
 
 
 # Health check endpoint
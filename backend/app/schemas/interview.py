@@ -1,10 +1,12 @@
 """
 Pydantic schemas for interview API.
 """
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+from ..services.code_runner import public_tests
+
 
 # Interview schemas
 class InterviewCreate(BaseModel):
@@ -81,6 +83,12 @@ class TaskResponse(BaseModel):
     status: str
     created_at: datetime
     
+    @field_validator("visible_tests")
+    @classmethod
+    def strip_precompiled_tests(cls, tests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Precompiled test keys stay internal."""
+        return public_tests(tests)
+    
     class Config:
         from_attributes = True
 
@@ -233,6 +241,12 @@ class TaskResponseV2(BaseModel):
     generation_meta: Optional[Dict[str, Any]] = None
     source_type: Optional[str] = None
     
+    @field_validator("visible_tests")
+    @classmethod
+    def strip_precompiled_tests(cls, tests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Precompiled test keys stay internal."""
+        return public_tests(tests)
+    
     class Config:
         from_attributes = True
 
@@ -12,6 +12,7 @@ from typing import Dict, Any, Optional, Tuple
 
 from ..models.interview import Task, Interview
 from .task_pool import get_task_sequence, get_task_by_difficulty
+from .code_runner import precompile_tests
 
 # Level progression map
 LEVEL_UP_MAP = {
@@ -106,8 +107,8 @@ async def generate_first_task(interview_id: int, level: str, direction: str, db:
         description=task_data["description"],
         difficulty=difficulty,
         category=task_data["category"],
-        visible_tests=task_data["visible_tests"],
-        hidden_tests=task_data["hidden_tests"],
+        visible_tests=precompile_tests(task_data["visible_tests"]),
+        hidden_tests=precompile_tests(task_data["hidden_tests"]),
         max_score=100.0,
         status="active"
     )
@@ -190,8 +191,8 @@ async def generate_next_task(
         description=task_data["description"],
         difficulty=difficulty,
         category=task_data["category"],
-        visible_tests=task_data["visible_tests"],
-        hidden_tests=task_data["hidden_tests"],
+        visible_tests=precompile_tests(task_data["visible_tests"]),
+        hidden_tests=precompile_tests(task_data["hidden_tests"]),
         max_score=100.0,
         status="active"
     )
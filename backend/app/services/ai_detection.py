@@ -12,7 +12,7 @@ from typing import Dict, Any, List, Optional
 import numpy as np
 
 from .scibox_client import scibox_client
-from .llm_protocol import classify_ai_like
+from .llm_protocol import classify_ai_like, gather_intents
 from ..core.config import settings
 
 
@@ -228,9 +228,11 @@ async def full_ai_detection(
             "details": {...}
         }
     """
-    # Run both checks in parallel (conceptually)
-    similarity_result = await calculate_code_similarity(candidate_code, task_key)
-    ai_style_result = await detect_ai_generated_code(candidate_code)
+    # Embedding comparison and LLM style check are independent: run them concurrently
+    similarity_result, ai_style_result = await gather_intents([
+        calculate_code_similarity(candidate_code, task_key),
+        detect_ai_generated_code(candidate_code)
+    ])
     
     # Extract scores
     code_similarity = similarity_result.get("max_similarity", 0.0)
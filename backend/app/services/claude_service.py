@@ -1,11 +1,12 @@
 """
 Claude/SciBox LLM service for all prompts.
 """
+import functools
 import json
 from typing import Optional, Any
-from openai import OpenAI
 
 from app.core.config import settings
+from app.services.http_client import shared_http
 from app.prompts import (
     RESUME_ANALYZER_SYSTEM, RESUME_ANALYZER_USER,
     VACANCY_ANALYZER_SYSTEM, VACANCY_ANALYZER_USER,
@@ -19,14 +20,24 @@ from app.prompts import (
 )
 
 
-# Initialize SciBox client
-client = OpenAI(
-    api_key=settings.SCIBOX_API_KEY,
-    base_url=settings.SCIBOX_BASE_URL,
-)
+@functools.cache
+def _get_client():
+    """
+    SciBox client, created on the first LLM call rather than at import
+    (async: callers are coroutines and must not block the loop).
+    """
+    from openai import AsyncOpenAI
+    
+    return AsyncOpenAI(
+        api_key=settings.SCIBOX_API_KEY,
+        base_url=settings.SCIBOX_BASE_URL,
+        timeout=settings.LLM_TIMEOUT_S,
+        max_retries=settings.LLM_MAX_RETRIES,
+        http_client=shared_http,
+    )
 
 
-def _call_llm(system_prompt: str, user_prompt: str, expect_json: bool = True) -> Any:
+async def _call_llm(system_prompt: str, user_prompt: str, expect_json: bool = True) -> Any:
     """
     Call LLM with system and user prompts.
     
@@ -42,7 +53,7 @@ def _call_llm(system_prompt: str, user_prompt: str, expect_json: bool = True) ->
     if expect_json:
         system_prompt = "/no_think " + system_prompt
     
-    response = client.chat.completions.create(
+    response = await _get_client().chat.completions.create(
         model=settings.CHAT_MODEL,
         messages=[
             {"role": "system", "content": system_prompt},
@@ -81,7 +92,7 @@ async def analyze_resume(resume_text: str) -> dict:
         Dict with years_of_experience, tracks, resume_self_grade, tech_stack, domains, summary
     """
     user_prompt = RESUME_ANALYZER_USER.format(resume_text=resume_text)
-    return _call_llm(RESUME_ANALYZER_SYSTEM, user_prompt)
+    return await _call_llm(RESUME_ANALYZER_SYSTEM, user_prompt)
 
 
 # 2. Vacancy Analyzer
@@ -96,7 +107,7 @@ async def analyze_vacancy(vacancy_text: str) -> dict:
         Dict with role_title, expected_grade, tracks, must_have_skills, etc.
     """
     user_prompt = VACANCY_ANALYZER_USER.format(vacancy_text=vacancy_text)
-    return _call_llm(VACANCY_ANALYZER_SYSTEM, user_prompt)
+    return await _call_llm(VACANCY_ANALYZER_SYSTEM, user_prompt)
 
 
 # 2.3. Resume-Vacancy Matcher
@@ -121,7 +132,7 @@ async def match_resume_vacancy(
         vacancy_parsed_json=json.dumps(vacancy_parsed, ensure_ascii=False),
         interview_summary=interview_summary or "null"
     )
-    return _call_llm(MATCHER_SYSTEM, user_prompt)
+    return await _call_llm(MATCHER_SYSTEM, user_prompt)
 
 
 # 3. Task Generator
@@ -152,7 +163,7 @@ async def generate_task(
         target_skills="\n".join(target_skills),
         vacancy_summary=vacancy_summary or ""
     )
-    return _call_llm(TASK_GENERATOR_SYSTEM, user_prompt)
+    return await _call_llm(TASK_GENERATOR_SYSTEM, user_prompt)
 
 
 # 4. Hint Generator
@@ -183,7 +194,7 @@ async def generate_hints(
         grade=grade,
         difficulty=difficulty
     )
-    return _call_llm(HINT_GENERATOR_SYSTEM, user_prompt)
+    return await _call_llm(HINT_GENERATOR_SYSTEM, user_prompt)
 
 
 # 5. Live Interview Assistant
@@ -220,7 +231,7 @@ async def live_assistant_response(
         grade=grade,
         difficulty=difficulty
     )
-    return _call_llm(LIVE_ASSISTANT_SYSTEM, user_prompt, expect_json=False)
+    return await _call_llm(LIVE_ASSISTANT_SYSTEM, user_prompt, expect_json=False)
 
 
 # 6. Solution Reviewer
@@ -251,7 +262,7 @@ async def review_solution(
         grade=grade,
         difficulty=difficulty
     )
-    return _call_llm(SOLUTION_REVIEWER_SYSTEM, user_prompt)
+    return await _call_llm(SOLUTION_REVIEWER_SYSTEM, user_prompt)
 
 
 # 7. AI Code Detector
@@ -266,7 +277,7 @@ async def detect_ai_code(candidate_code: str) -> dict:
         Dict with ai_likeness_score, explanation, suspicious_signals
     """
     user_prompt = AI_DETECTOR_USER.format(candidate_code=candidate_code)
-    return _call_llm(AI_DETECTOR_SYSTEM, user_prompt)
+    return await _call_llm(AI_DETECTOR_SYSTEM, user_prompt)
 
 
 # 8. Final Report Generator
@@ -300,6 +311,6 @@ async def generate_final_report(
         trust_and_ai_json=json.dumps(trust_and_ai, ensure_ascii=False),
         solution_review_summary_json=json.dumps(solution_review_summary, ensure_ascii=False)
     )
-    return _call_llm(FINAL_REPORT_SYSTEM, user_prompt)
+    return await _call_llm(FINAL_REPORT_SYSTEM, user_prompt)
 
 # пидормот
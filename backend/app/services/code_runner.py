@@ -2,21 +2,57 @@
 Code execution service.
 Runs candidate code in isolated environment.
 """
+import builtins
+import functools
+import logging
 import subprocess
 import json
 import time
 import ast
-from typing import Dict, List, Any
+import typing
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from .code_sanitizer import detect_dangerous_code, get_security_summary
+from .judge_pool import TIME_LIMIT_ERROR, get_judge_pool
+
+logger = logging.getLogger(__name__)
 
 
 def run_code(
     code: str,
     language: str,
     visible_tests: List[Dict[str, Any]],
-    hidden_tests: List[Dict[str, Any]]
+    hidden_tests: List[Dict[str, Any]],
+    early_exit: bool = False
 ) -> Dict[str, Any]:
     """
     Run code against test cases.
+    Uses the judge worker pool when CODE_RUNNER_PYTHON is configured,
+    otherwise executes in the current process.
+    
+    With early_exit the hidden tests run smallest input first and stop at the
+    first failure, so passed_hidden is only a lower bound. Use it for quick
+    checks, not for scoring.
+    """
+    pool = get_judge_pool()
+    if pool is not None and language == "python":
+        return pool.run_code(code, language, visible_tests, hidden_tests, early_exit)
+    return run_code_in_process(code, language, visible_tests, hidden_tests, early_exit=early_exit)
+
+
+def run_code_in_process(
+    code: str,
+    language: str,
+    visible_tests: List[Dict[str, Any]],
+    hidden_tests: List[Dict[str, Any]],
+    on_test: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    early_exit: bool = False
+) -> Dict[str, Any]:
+    """
+    Run code against test cases in the current interpreter.
+    on_test("visible"|"hidden", test_result) is called after every test,
+    which lets the judge worker stream progress to the pool.
+    early_exit: see run_code.
     """
     result = {
         "passed_visible": 0,
@@ -32,9 +68,43 @@ def run_code(
         start_time = time.time()
         
         if language == "python":
+            # Syntax errors and missing solution function fail every test
+            # the same way, so detect them once instead of per test
+            namespace, solution_func, prepare_error = prepare_solution(code)
+            if prepare_error:
+                result["visible_test_details"] = [
+                    {
+                        "passed": False,
+                        "actual": None,
+                        "error": prepare_error,
+                        "index": i + 1,
+                        "input": test.get("input"),
+                        "expected": test.get("expected_output") or test.get("expected"),
+                        "description": test.get("description", "")
+                    }
+                    for i, test in enumerate(visible_tests)
+                ]
+                result["error_message"] = prepare_error
+                result["execution_time_ms"] = round((time.time() - start_time) * 1000, 2)
+                return result
+            
+            # Parse every test once, outside the timed section
+            parse_start = time.time()
+            visible_cases = precompute_tests(visible_tests)
+            hidden_cases = precompute_tests(hidden_tests)
+            if early_exit:
+                # Cheapest first, so a buggy solution fails fast
+                hidden_cases.sort(key=case_size)
+            start_time += time.time() - parse_start
+            
+            # The code was executed once above; between tests only the globals
+            # a test added are dropped instead of re-running the whole module
+            baseline_keys = frozenset(namespace)
+            
             # Test visible cases with detailed results
-            for i, test in enumerate(visible_tests):
-                test_result = run_single_python_test_detailed(code, test)
+            for i, (test, case) in enumerate(zip(visible_tests, visible_cases)):
+                test_result = run_with(solution_func, case)
+                _reset_namespace(namespace, baseline_keys)
                 test_result["index"] = i + 1
                 test_result["input"] = test.get("input")
                 test_result["expected"] = test.get("expected_output") or test.get("expected")
@@ -42,11 +112,19 @@ def run_code(
                 result["visible_test_details"].append(test_result)
                 if test_result["passed"]:
                     result["passed_visible"] += 1
+                if on_test:
+                    on_test("visible", test_result)
             
             # Test hidden cases (no details exposed)
-            for test in hidden_tests:
-                if run_single_python_test(code, test):
+            for case in hidden_cases:
+                passed = run_with(solution_func, case)["passed"]
+                _reset_namespace(namespace, baseline_keys)
+                if passed:
                     result["passed_hidden"] += 1
+                if on_test:
+                    on_test("hidden", {"passed": passed})
+                if early_exit and not passed:
+                    break
                     
         elif language in ["javascript", "js"]:
             result["error_message"] = "JavaScript execution coming soon"
@@ -64,150 +142,260 @@ def run_code(
     return result
 
 
-def create_execution_env():
-    """Create safe execution environment with all needed imports."""
-    # Import typing for annotations
-    import typing
+def prepare_solution(code: str):
+    """
+    Compile and execute candidate code once, locating the solution function.
     
-    env = {
-        "__builtins__": __builtins__,
-        # Typing support
-        "List": typing.List,
-        "Dict": typing.Dict,
-        "Set": typing.Set,
-        "Tuple": typing.Tuple,
-        "Optional": typing.Optional,
-        "Any": typing.Any,
-        "Union": typing.Union,
-        # Built-in types (for runtime)
-        "list": list,
-        "dict": dict,
-        "set": set,
-        "tuple": tuple,
-        "str": str,
-        "int": int,
-        "float": float,
-        "bool": bool,
-        "len": len,
-        "range": range,
-        "enumerate": enumerate,
-        "zip": zip,
-        "map": map,
-        "filter": filter,
-        "sorted": sorted,
-        "reversed": reversed,
-        "sum": sum,
-        "min": min,
-        "max": max,
-        "abs": abs,
-        "all": all,
-        "any": any,
-        "print": print,
-    }
-    return env
+    The code runs in a single namespace (globals == locals), so helper
+    functions and classes defined next to the solution are visible to it.
+    
+    Returns:
+        Tuple of (namespace, solution_func, error). On failure namespace/solution_func
+        are None and error holds the message shown to the candidate.
+    """
+    try:
+        compiled = compile(code, '<candidate>', 'exec')
+    except SyntaxError as e:
+        return None, None, f"Syntax Error: {str(e)}"
+    
+    logger.debug("📝 Executing code:\n%.500s", code)
+    namespace = create_execution_env()
+    env_keys = frozenset(namespace)
+    try:
+        exec(compiled, namespace)
+    except Exception as e:
+        return None, None, f"Runtime Error: {str(e)}"
+    
+    defined = {name: obj for name, obj in namespace.items() if name not in env_keys}
+    solution_func = find_solution_func(defined)
+    if not solution_func:
+        return None, None, "Функция решения не найдена"
+    
+    return namespace, solution_func, None
 
 
-def run_single_python_test_detailed(code: str, test: Dict[str, Any]) -> Dict[str, Any]:
+def _reset_namespace(namespace: Dict[str, Any], baseline_keys: frozenset):
     """
-    Run a single Python test with detailed results.
+    Drop globals added while a test ran, so tests do not see each other's state.
+    Globals that existed after the initial exec are not restored: tests run in
+    order and solution functions are expected not to rebind module state.
     """
+    for key in [key for key in namespace if key not in baseline_keys]:
+        del namespace[key]
+
+
+def run_with(solution_func, case: Tuple[list, dict, Any]) -> Dict[str, Any]:
+    """Run one pre-parsed (args, kwargs, expected_val) case against a prepared solution."""
     result = {
         "passed": False,
         "actual": None,
         "error": None
     }
     
+    args, kwargs, expected_val = case
     try:
-        local_vars = {}
-        global_vars = create_execution_env()
-        
-        # Execute the code
-        exec(code, global_vars, local_vars)
-        
-        # Find the solution function
-        solution_func = None
-        for name, obj in local_vars.items():
-            if callable(obj) and not name.startswith('_'):
-                solution_func = obj
-                break
-        
-        if not solution_func:
-            result["error"] = "Функция решения не найдена"
-            return result
-        
-        # Parse test input
-        test_input = test.get("input")
-        expected = test.get("expected_output") or test.get("expected")
-        
-        args, kwargs = parse_test_input(test_input)
-        
-        # Run the function
         actual = solution_func(*args, **kwargs)
         result["actual"] = actual
-        
-        # Parse expected
-        expected_val = parse_expected(expected)
-        
-        # Compare
         result["passed"] = compare_results(actual, expected_val)
         
-        print(f"🧪 Test: input={test_input}, expected={expected_val}, actual={actual}, passed={result['passed']}")
+        # Lazy %-args: nothing is formatted unless DEBUG is enabled
+        logger.debug("🧪 Test: input=%s %s, expected=%r, actual=%r, passed=%s",
+                     args, kwargs, expected_val, actual, result["passed"])
         
     except Exception as e:
-        result["error"] = str(e)
-        print(f"❌ Test FAILED with exception: {e}")
+        result["error"] = str(e) or type(e).__name__
+        logger.debug("❌ Test FAILED with exception: %r", e)
     
     return result
 
 
-def run_single_python_test(code: str, test: Dict[str, Any]) -> bool:
+def find_solution_func(local_vars: Dict[str, Any]):
     """
-    Run a single Python test.
-    Returns True if test passed, False otherwise.
+    Pick the candidate's entry point from the executed namespace.
+    
+    Naming contract: a function called `solution`, `solve` or `main` is used
+    as-is; otherwise the last defined public callable is taken, since helpers
+    and imports normally come before the main function.
     """
-    try:
-        local_vars = {}
-        global_vars = create_execution_env()
-        
-        # Execute the code
-        exec(code, global_vars, local_vars)
-        
-        # Find the solution function
-        solution_func = None
-        for name, obj in local_vars.items():
-            if callable(obj) and not name.startswith('_'):
-                solution_func = obj
-                break
-        
-        if not solution_func:
-            print(f"⚠️ No solution function found")
-            return False
-        
-        # Parse test input
-        test_input = test.get("input")
-        expected = test.get("expected_output") or test.get("expected")
-        
-        args, kwargs = parse_test_input(test_input)
-        
-        # Run the function
-        actual = solution_func(*args, **kwargs)
-        
-        # Parse expected
-        expected_val = parse_expected(expected)
-        
-        # Compare
-        passed = compare_results(actual, expected_val)
-        
-        if passed:
-            print(f"✅ Hidden test PASSED")
-        else:
-            print(f"❌ Hidden test FAILED: expected={expected_val}, actual={actual}")
-        
-        return passed
-        
-    except Exception as e:
-        print(f"❌ Hidden test exception: {e}")
-        return False
+    for candidate in SOLUTION_FUNC_NAMES:
+        if callable(local_vars.get(candidate)):
+            return local_vars[candidate]
+    
+    solution_func = None
+    for name, obj in local_vars.items():
+        if callable(obj) and not name.startswith('_'):
+            solution_func = obj
+    return solution_func
+
+
+# Preferred entry point names, checked before falling back to the last callable
+SOLUTION_FUNC_NAMES = ("solution", "solve", "main")
+
+# Modules candidate code may import (standard algorithmic toolkit)
+_ALLOWED_MODULES = frozenset({
+    "__future__", "bisect", "collections", "dataclasses", "decimal", "enum", "fractions",
+    "functools", "heapq", "itertools", "math", "operator", "random", "re",
+    "statistics", "string", "typing",
+})
+
+
+def _safe_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """Allow imports only from the whitelisted standard modules."""
+    if level != 0 or name.partition(".")[0] not in _ALLOWED_MODULES:
+        raise ImportError(f"Импорт модуля '{name}' запрещён")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+# Whitelisted builtins, built once at import and copied into every solution's
+# __builtins__, so name resolution is a single lookup in a small dict and
+# open/eval/exec are not directly in scope. This is not a security boundary:
+# object introspection (e.g. ().__class__.__base__.__subclasses__()) gets past
+# it. Isolation comes from the judge worker process (rlimits, stripped env).
+_BUILTINS = {
+    name: getattr(builtins, name)
+    for name in (
+        # Types
+        "bool", "bytearray", "bytes", "complex", "dict", "float", "frozenset",
+        "int", "list", "object", "set", "str", "tuple", "type",
+        # Functions
+        "abs", "all", "any", "bin", "callable", "chr", "divmod", "enumerate",
+        "filter", "format", "getattr", "hasattr", "hash", "hex", "id",
+        "isinstance", "issubclass", "iter", "len", "map", "max", "min",
+        "next", "oct", "ord", "pow", "print", "range", "repr", "reversed",
+        "round", "slice", "sorted", "sum", "zip",
+        # Class definitions
+        "__build_class__", "classmethod", "property", "staticmethod", "super",
+        # Exceptions
+        "ArithmeticError", "AssertionError", "AttributeError", "Exception",
+        "IndexError", "KeyError", "LookupError", "NotImplementedError",
+        "OverflowError", "RecursionError", "RuntimeError", "StopIteration",
+        "TypeError", "ValueError", "ZeroDivisionError",
+    )
+}
+_BUILTINS["__import__"] = _safe_import
+
+
+# Built once; every solution gets a copy. __builtins__ is added per run (see
+# create_execution_env), the template itself holds only immutable values
+_ENV_TEMPLATE = {
+    "__name__": "solution",
+    # Typing support
+    "List": typing.List,
+    "Dict": typing.Dict,
+    "Set": typing.Set,
+    "Tuple": typing.Tuple,
+    "Optional": typing.Optional,
+    "Any": typing.Any,
+    "Union": typing.Union,
+}
+
+
+def create_execution_env():
+    """
+    Create the execution environment for one solution. Its __builtins__ is a
+    fresh copy of the whitelist, so code that rebinds a builtin cannot change
+    it for later submissions in the same worker.
+    """
+    env = _ENV_TEMPLATE.copy()
+    env["__builtins__"] = dict(_BUILTINS)
+    return env
+
+
+# Keys added by precompile_tests; internal to grading, see public_tests
+PRECOMPILED_TEST_KEYS = frozenset({"args_json", "kwargs_json", "expected_json"})
+
+
+def public_tests(tests: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Copies of stored tests without the precompiled keys, for API responses and prompts."""
+    return [
+        {key: value for key, value in test.items() if key not in PRECOMPILED_TEST_KEYS}
+        for test in tests or []
+    ]
+
+
+def precompile_tests(tests: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Parse test cases once when a task is saved, so grading skips parsing.
+    
+    Adds args_json/kwargs_json/expected_json next to the raw input and
+    expected_output strings, which are kept for display. Values that do not
+    survive a JSON round-trip (tuples, sets, non-str keys) are left unparsed
+    and go through parse_test_input at run time as before. The added keys are
+    internal: anything shown to the candidate or an LLM goes through public_tests.
+    """
+    compiled = []
+    for test in tests or []:
+        test = dict(test)
+        args, kwargs = parse_test_input(test.get("input"))
+        expected_val = parse_expected(test.get("expected_output") or test.get("expected"))
+        try:
+            args_json = json.dumps(args)
+            kwargs_json = json.dumps(kwargs)
+            expected_json = json.dumps(expected_val)
+        except (TypeError, ValueError):
+            compiled.append(test)
+            continue
+        if (json.loads(args_json) == args and json.loads(kwargs_json) == kwargs
+                and json.loads(expected_json) == expected_val):
+            test["args_json"] = args_json
+            test["kwargs_json"] = kwargs_json
+            test["expected_json"] = expected_json
+        compiled.append(test)
+    return compiled
+
+
+def precompute_tests(tests: List[Dict[str, Any]]) -> List[Tuple[list, dict, Any]]:
+    """Parse a list of tests into (args, kwargs, expected_val) cases in one go."""
+    return [load_test_case(test) for test in tests]
+
+
+def case_size(case: Tuple[list, dict, Any]) -> int:
+    """O(1) size estimate of a parsed case: length of its first argument."""
+    args = case[0]
+    if args and hasattr(args[0], "__len__"):
+        return len(args[0])
+    return 1
+
+
+def load_test_case(test: Dict[str, Any]) -> Tuple[list, dict, Any]:
+    """
+    Get (args, kwargs, expected_val) for a test.
+    Decoding the stored JSON gives fresh objects, so candidate code that
+    mutates its input cannot corrupt the task's stored tests.
+    """
+    if "args_json" in test:
+        return (
+            json.loads(test["args_json"]),
+            json.loads(test["kwargs_json"]),
+            json.loads(test["expected_json"])
+        )
+    args, kwargs = parse_test_input(test.get("input"))
+    expected_val = parse_expected(test.get("expected_output") or test.get("expected"))
+    return args, kwargs, expected_val
+
+
+def _safe_literal(node: ast.AST):
+    """
+    Evaluate an already parsed literal node, like ast.literal_eval but without
+    its string handling and generic dispatch. Raises ValueError otherwise.
+    """
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.List):
+        return [_safe_literal(e) for e in node.elts]
+    if isinstance(node, ast.Tuple):
+        return tuple(_safe_literal(e) for e in node.elts)
+    if isinstance(node, ast.Set):
+        return {_safe_literal(e) for e in node.elts}
+    if isinstance(node, ast.Dict):
+        if None in node.keys:  # {**other}
+            raise ValueError("malformed node")
+        return {_safe_literal(k): _safe_literal(v) for k, v in zip(node.keys, node.values)}
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _safe_literal(node.operand)
+        if isinstance(operand, (int, float, complex)) and not isinstance(operand, bool):
+            return -operand if isinstance(node.op, ast.USub) else +operand
+    raise ValueError("malformed node")
 
 
 def parse_test_input(test_input):
@@ -221,6 +409,12 @@ def parse_test_input(test_input):
     if isinstance(test_input, str):
         test_input = test_input.strip()
         
+        # Common case: the whole input is a single JSON value ("[1,2,3]", "42")
+        try:
+            return [json.loads(test_input)], kwargs
+        except ValueError:
+            pass
+        
         try:
             # Try to parse as Python call arguments
             fake_call = f"func({test_input})"
@@ -230,17 +424,17 @@ def parse_test_input(test_input):
             # Extract args
             for arg in call_node.args:
                 try:
-                    args.append(ast.literal_eval(arg))
-                except:
-                    # If literal_eval fails, try compile+eval
+                    args.append(_safe_literal(arg))
+                except ValueError:
+                    # Not a plain literal (e.g. "[0] * 5"), try compile+eval
                     code = compile(ast.Expression(arg), '<string>', 'eval')
                     args.append(eval(code))
             
             # Extract kwargs
             for kw in call_node.keywords:
                 try:
-                    kwargs[kw.arg] = ast.literal_eval(kw.value)
-                except:
+                    kwargs[kw.arg] = _safe_literal(kw.value)
+                except ValueError:
                     code = compile(ast.Expression(kw.value), '<string>', 'eval')
                     kwargs[kw.arg] = eval(code)
                     
@@ -272,6 +466,11 @@ def parse_expected(expected):
         return None
     
     if isinstance(expected, str):
+        # JSON covers most expected values and is parsed in C
+        try:
+            return json.loads(expected)
+        except ValueError:
+            pass
         try:
             return ast.literal_eval(expected)
         except:
@@ -280,24 +479,94 @@ def parse_expected(expected):
     return expected
 
 
+_SCALAR_TYPES = (int, float, str, bytes)
+
+
 def compare_results(actual, expected):
     """Compare actual result with expected."""
+    # Tuple answer vs list expectation (or vice versa): compare as lists
+    # instead of falling through to the str() comparison below
+    if isinstance(actual, tuple) and isinstance(expected, list):
+        actual = list(actual)
+    elif isinstance(actual, list) and isinstance(expected, tuple):
+        expected = list(expected)
+    
     # Direct comparison
     if actual == expected:
         return True
     
-    # Try string comparison
-    if str(actual) == str(expected):
-        return True
+    # Floats: relative tolerance instead of exact equality
+    if isinstance(actual, float) and isinstance(expected, float):
+        return abs(actual - expected) <= 1e-9 * max(1.0, abs(actual), abs(expected))
     
-    # For lists, try sorted comparison (for problems where order doesn't matter)
-    if isinstance(actual, list) and isinstance(expected, list):
-        if len(actual) == len(expected):
-            # Try direct comparison first
-            if actual == expected:
-                return True
-            # Don't sort - order usually matters
+    # String comparison only for mismatched scalars (e.g. "5" vs 5);
+    # never repr whole collections
+    if (
+        type(actual) is not type(expected)
+        and isinstance(actual, _SCALAR_TYPES)
+        and isinstance(expected, _SCALAR_TYPES)
+    ):
+        return str(actual) == str(expected)
     
     return False
 
+
+def run_edge_case_tests(
+    code: str,
+    language: str,
+    edge_case_tests: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Run AI-generated edge case tests against candidate code.
+    Goes through run_code, so the tests run in a judge worker under the same
+    time and memory limits as the regular tests.
+    """
+    result = {
+        "total": len(edge_case_tests),
+        "passed": 0,
+        "failed": 0,
+        "dangerous_code_detected": False,
+        "error": None,
+        "details": []
+    }
+    
+    if language != "python":
+        result["error"] = f"Language {language} not yet supported"
+        return result
+    
+    is_dangerous, _ = _cached_dangerous_code_check(code)
+    result["dangerous_code_detected"] = is_dangerous
+    
+    run = run_code(code, language, visible_tests=edge_case_tests, hidden_tests=[])
+    error = run.get("error_message")
+    if error and not error.startswith(TIME_LIMIT_ERROR):
+        # Code did not compile or has no solution function: nothing was tested
+        result["error"] = error
+        return result
+    
+    for test, test_result in zip(edge_case_tests, run["visible_test_details"]):
+        test_result["category"] = test.get("category", "")
+        result["details"].append(test_result)
+        if test_result["passed"]:
+            result["passed"] += 1
+        else:
+            result["failed"] += 1
+    
+    return result
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_dangerous_code_check(code: str) -> Tuple[bool, Tuple[str, ...]]:
+    """Memoized detect_dangerous_code: the same submission is often re-run."""
+    is_dangerous, patterns = detect_dangerous_code(code)
+    return is_dangerous, tuple(patterns)
+
+
+def validate_code_safety(code: str) -> Dict[str, Any]:
+    """
+    Security check before running code (anti prompt injection).
+    Returns security summary with risk_level: low|medium|high.
+    """
+    return get_security_summary(code)
+
 # пидормот
@@ -2,6 +2,9 @@
 Code Sanitizer Service - Protection against prompt injection and malicious code.
 Sanitizes user code before sending to LLM or executing.
 """
+import ast
+import copy
+import functools
 import re
 from typing import Tuple, List
 
@@ -104,6 +107,88 @@ DANGEROUS_CODE_PATTERNS = [
     r'__globals__',
 ]
 
+# Compiled once at import; checks run on every code submission
+_INJECTION_RE = [re.compile(p, re.IGNORECASE) for p in PROMPT_INJECTION_PATTERNS]
+_DANGEROUS_RE = [re.compile(p, re.IGNORECASE) for p in DANGEROUS_CODE_PATTERNS]
+
+
+# AST-level blacklist for detect_dangerous_code (regexes above are the fallback
+# for code that does not parse)
+_FORBIDDEN_MODULES = frozenset({
+    "os", "sys", "subprocess", "shutil", "socket", "requests", "urllib", "http",
+})
+_FORBIDDEN_CALLS = frozenset({
+    "eval", "exec", "compile", "__import__", "globals", "locals",
+})
+# Flagged only with a dunder or computed attribute name (see _is_dynamic_dunder_access)
+_ATTR_ACCESS_CALLS = frozenset({"getattr", "setattr", "delattr"})
+_FORBIDDEN_ATTRS = frozenset({
+    "__class__", "__bases__", "__subclasses__", "__mro__", "__code__",
+    "__globals__", "__builtins__",
+})
+
+
+class _SafetyVisitor(ast.NodeVisitor):
+    """Single walk over the AST collecting forbidden imports, calls and attributes."""
+
+    def __init__(self):
+        self.reasons: List[str] = []
+
+    def _check_module(self, name: str):
+        if name.split(".", 1)[0] in _FORBIDDEN_MODULES:
+            self.reasons.append(f"import {name}")
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self._check_module(alias.name)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.module:
+            self._check_module(node.module)
+
+    def visit_Call(self, node: ast.Call):
+        func = node.func
+        if isinstance(func, ast.Name):
+            if func.id in _FORBIDDEN_CALLS:
+                self.reasons.append(f"call {func.id}()")
+            elif func.id in _ATTR_ACCESS_CALLS and _is_dynamic_dunder_access(node):
+                self.reasons.append(f"call {func.id}() on a dunder or computed attribute")
+            elif func.id == "open" and _is_write_mode(node):
+                self.reasons.append("call open() for writing")
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node: ast.Attribute):
+        if node.attr in _FORBIDDEN_ATTRS:
+            self.reasons.append(f"attribute {node.attr}")
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name):
+        if node.id in _FORBIDDEN_ATTRS:
+            self.reasons.append(f"name {node.id}")
+
+
+def _is_dynamic_dunder_access(call: ast.Call) -> bool:
+    """Whether a getattr/setattr/delattr call names a dunder or a non-literal attribute."""
+    if len(call.args) < 2:
+        return True
+    name = call.args[1]
+    if not (isinstance(name, ast.Constant) and isinstance(name.value, str)):
+        return True
+    return name.value.startswith("__")
+
+
+def _is_write_mode(call: ast.Call) -> bool:
+    """Whether an open(...) call has a literal write/append/create mode."""
+    mode = call.args[1] if len(call.args) > 1 else None
+    for kw in call.keywords:
+        if kw.arg == "mode":
+            mode = kw.value
+    return (
+        isinstance(mode, ast.Constant)
+        and isinstance(mode.value, str)
+        and any(c in mode.value for c in "wax")
+    )
+
 
 def detect_prompt_injection(code: str) -> Tuple[bool, List[str]]:
     """
@@ -116,11 +201,11 @@ def detect_prompt_injection(code: str) -> Tuple[bool, List[str]]:
         Tuple of (is_suspicious, list of detected patterns)
     """
     detected = []
-    code_lower = code.lower()
     
-    for pattern in PROMPT_INJECTION_PATTERNS:
-        if re.search(pattern, code_lower, re.IGNORECASE):
-            detected.append(pattern)
+    # IGNORECASE already handles case, no need for a lowered copy of the code
+    for rx in _INJECTION_RE:
+        if rx.search(code):
+            detected.append(rx.pattern)
     
     return len(detected) > 0, detected
 
@@ -135,13 +220,20 @@ def detect_dangerous_code(code: str) -> Tuple[bool, List[str]]:
     Returns:
         Tuple of (is_dangerous, list of detected patterns)
     """
-    detected = []
-    
-    for pattern in DANGEROUS_CODE_PATTERNS:
-        if re.search(pattern, code, re.IGNORECASE):
-            detected.append(pattern)
+    try:
+        tree = ast.parse(code)
+        visitor = _SafetyVisitor()
+        visitor.visit(tree)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        # Doesn't parse, or too deeply nested for the recursive visitor
+        # (e.g. a long a + b + ... chain): fall back to scanning the source
+        detected = []
+        for rx in _DANGEROUS_RE:
+            if rx.search(code):
+                detected.append(rx.pattern)
+        return len(detected) > 0, detected
     
-    return len(detected) > 0, detected
+    return len(visitor.reasons) > 0, visitor.reasons
 
 
 def sanitize_code_for_llm(code: str) -> Tuple[str, dict]:
@@ -155,6 +247,14 @@ def sanitize_code_for_llm(code: str) -> Tuple[str, dict]:
     Returns:
         Tuple of (sanitized_code, report_dict)
     """
+    wrapped_code, report = _sanitize_code_for_llm(code)
+    return wrapped_code, copy.deepcopy(report)
+
+
+# The same code is usually checked several times per submission and across
+# chat turns; results are cached and callers get copies of the reports
+@functools.lru_cache(maxsize=256)
+def _sanitize_code_for_llm(code: str) -> Tuple[str, dict]:
     report = {
         "original_length": len(code),
         "prompt_injection_detected": False,
@@ -194,9 +294,11 @@ def sanitize_code_for_llm(code: str) -> Tuple[str, dict]:
     ]
     
     for token, replacement in llm_tokens:
-        if token in sanitized:
-            count = sanitized.count(token)
-            sanitized = sanitized.replace(token, replacement)
+        # One scan per token: split gives both the count and the pieces to join
+        parts = sanitized.split(token)
+        count = len(parts) - 1
+        if count:
+            sanitized = replacement.join(parts)
             report["modifications"].append(f"Заменено '{token}' -> '{replacement}' ({count} раз)")
     
     # Wrap code in clear delimiters for LLM context
@@ -234,6 +336,11 @@ def get_security_summary(code: str) -> dict:
     Returns:
         Security summary dict
     """
+    return copy.deepcopy(_get_security_summary(code))
+
+
+@functools.lru_cache(maxsize=256)
+def _get_security_summary(code: str) -> dict:
     injection_detected, injection_patterns = detect_prompt_injection(code)
     dangerous_detected, dangerous_patterns = detect_dangerous_code(code)
     
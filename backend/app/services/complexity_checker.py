@@ -8,11 +8,12 @@ According to ТЗ:
 4. Coder model analyzes code and estimates actual complexity
 5. We compare candidate's understanding with reality
 """
-import json
-import re
-from typing import Dict, Any, Optional
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
 
-from .scibox_client import scibox_client
+from .scibox_client import scibox_client, strip_think_blocks, loads_json
 from .llm_protocol import (
     ask_question,
     evaluate_answer,
@@ -22,6 +23,37 @@ from .llm_protocol import (
 from ..core.config import settings
 
 
+# Analyses started when the complexity question is asked, keyed by candidate code.
+# Consumed by full_complexity_check once the answer arrives.
+_pending_analyses: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+MAX_PENDING_ANALYSES = 256
+
+# Parsed analyses keyed by code hash + coder model; bump the version when
+# the analysis prompt changes so stale entries are not reused
+COMPLEXITY_CACHE_VERSION = "1"
+MAX_CACHED_ANALYSES = 1024
+_analysis_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _analysis_cache_key(code: str) -> str:
+    raw = f"{COMPLEXITY_CACHE_VERSION}\0{settings.CODER_MODEL}\0{code}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _get_cached_analysis(code: str) -> Optional[Dict[str, Any]]:
+    key = _analysis_cache_key(code)
+    analysis = _analysis_cache.get(key)
+    if analysis is not None:
+        _analysis_cache.move_to_end(key)
+    return analysis
+
+
+def _cache_analysis(code: str, analysis: Dict[str, Any]):
+    _analysis_cache[_analysis_cache_key(code)] = analysis
+    while len(_analysis_cache) > MAX_CACHED_ANALYSES:
+        _analysis_cache.popitem(last=False)
+
+
 async def generate_complexity_question(
     task_title: str,
     task_description: str,
@@ -68,6 +100,10 @@ async def analyze_code_complexity(code: str) -> Dict[str, Any]:
             "algorithm_type": "two_pointers"
         }
     """
+    cached = _get_cached_analysis(code)
+    if cached is not None:
+        return cached
+    
     system_prompt = """/no_think
 Ты эксперт по анализу алгоритмов. Проанализируй код и определи:
 1. Временную сложность (Big O)
@@ -97,7 +133,7 @@ async def analyze_code_complexity(code: str) -> Dict[str, Any]:
         )
         
         # Clean response
-        response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL).strip()
+        response = strip_think_blocks(response).strip()
         
         # Try to parse JSON
         try:
@@ -105,7 +141,9 @@ async def analyze_code_complexity(code: str) -> Dict[str, Any]:
             start = response.find('{')
             end = response.rfind('}') + 1
             if start != -1 and end > start:
-                return json.loads(response[start:end])
+                analysis = loads_json(response[start:end])
+                _cache_analysis(code, analysis)
+                return analysis
         except:
             pass
         
@@ -125,6 +163,93 @@ async def analyze_code_complexity(code: str) -> Dict[str, Any]:
         }
 
 
+def schedule_complexity_analysis(code: str) -> "asyncio.Task[Dict[str, Any]]":
+    """
+    Start analyze_code_complexity in the background while the candidate
+    is still reading the question and typing the answer.
+    """
+    task = _pending_analyses.get(code)
+    if task is not None:
+        return task
+    
+    # Drop the oldest analyses nobody came back for
+    while len(_pending_analyses) >= MAX_PENDING_ANALYSES:
+        stale = _pending_analyses.pop(next(iter(_pending_analyses)))
+        stale.cancel()
+    
+    task = asyncio.create_task(analyze_code_complexity(code))
+    _pending_analyses[code] = task
+    return task
+
+
+async def analyze_and_evaluate_complexity(
+    code: str,
+    candidate_answer: str,
+    difficulty: str = "junior"
+) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Analyze code complexity and evaluate the candidate's answer in one coder call.
+    
+    Returns:
+        (actual_complexity, evaluation) or None if the response is unusable,
+        in which case the caller falls back to the two-step flow.
+    """
+    system_prompt = """/no_think
+Ты эксперт по анализу алгоритмов и интервьюер. Тебе дан код кандидата и его ответ
+на вопрос о сложности решения. Сделай две вещи:
+1. Определи реальную временную и пространственную сложность кода (Big O) и тип алгоритма.
+2. Оцени ответ кандидата относительно реальной сложности по шкале 0..3
+   (уровень кандидата: """ + difficulty + """).
+
+Отвечай ТОЛЬКО JSON:
+{
+    "actual_complexity": {
+        "time_complexity": "O(...)",
+        "space_complexity": "O(...)",
+        "algorithm_type": "название подхода",
+        "explanation": "краткое объяснение"
+    },
+    "evaluation": {
+        "score": 0,
+        "comment_for_interviewer": "...",
+        "short_feedback_for_candidate": "...",
+        "extra_topics": ["..."]
+    }
+}
+"""
+    
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"Код кандидата:\n\n```python\n{code}\n```\n\nОтвет кандидата о сложности:\n{candidate_answer}"}
+    ]
+    
+    try:
+        response = await scibox_client.chat_completion(
+            messages=messages,
+            model=settings.CODER_MODEL,
+            temperature=0.1,
+            max_tokens=768
+        )
+        
+        response = strip_think_blocks(response).strip()
+        start = response.find('{')
+        end = response.rfind('}') + 1
+        if start == -1 or end <= start:
+            return None
+        data = loads_json(response[start:end])
+        actual_complexity = data["actual_complexity"]
+        evaluation = data["evaluation"]
+        if not isinstance(actual_complexity, dict) or not isinstance(evaluation, dict):
+            return None
+        if "time_complexity" not in actual_complexity or "score" not in evaluation:
+            return None
+    except Exception:
+        return None
+    
+    _cache_analysis(code, actual_complexity)
+    return actual_complexity, _annotate_complexity_evaluation(evaluation, candidate_answer, actual_complexity)
+
+
 async def evaluate_complexity_answer(
     candidate_answer: str,
     actual_complexity: Dict[str, Any],
@@ -168,6 +293,15 @@ async def evaluate_complexity_answer(
         key_points=key_points
     )
     
+    return _annotate_complexity_evaluation(result, candidate_answer, actual_complexity)
+
+
+def _annotate_complexity_evaluation(
+    result: Dict[str, Any],
+    candidate_answer: str,
+    actual_complexity: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Add time/space correctness and understanding level to an LLM evaluation."""
     # Check if time/space are correct
     answer_lower = candidate_answer.lower()
     time_comp = actual_complexity.get('time_complexity', '').lower()
@@ -208,16 +342,28 @@ async def full_complexity_check(
     
     Returns complete evaluation with score and feedback.
     """
-    # Step 1: Analyze actual complexity
-    actual_complexity = await analyze_code_complexity(candidate_code)
+    pending = _pending_analyses.pop(candidate_code, None)
+    fused = None
+    if (pending is None or pending.cancelled()) and _get_cached_analysis(candidate_code) is None:
+        # Nothing prefetched or cached: analysis and evaluation in a single LLM round-trip
+        fused = await analyze_and_evaluate_complexity(candidate_code, candidate_answer, difficulty)
     
-    # Step 2: Evaluate candidate's answer
-    evaluation = await evaluate_complexity_answer(
-        candidate_answer=candidate_answer,
-        actual_complexity=actual_complexity,
-        task_description=task_description,
-        difficulty=difficulty
-    )
+    if fused:
+        actual_complexity, evaluation = fused
+    else:
+        # Step 1: Analyze actual complexity (usually prefetched while the candidate was answering)
+        if pending is not None and not pending.cancelled():
+            actual_complexity = await pending
+        else:
+            actual_complexity = await analyze_code_complexity(candidate_code)
+        
+        # Step 2: Evaluate candidate's answer
+        evaluation = await evaluate_complexity_answer(
+            candidate_answer=candidate_answer,
+            actual_complexity=actual_complexity,
+            task_description=task_description,
+            difficulty=difficulty
+        )
     
     return {
         "actual_complexity": actual_complexity,
@@ -1,8 +1,11 @@
 """
 Grading service integrating new deterministic logic.
 """
-from sqlalchemy.orm import Session
-from typing import Optional
+import functools
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
+from typing import Dict, List, Optional
 
 from ..models.interview import Interview, Task, Submission, Hint
 from ..grading.levels import (
@@ -17,6 +20,15 @@ from ..adaptive.engine import TaskResult, update_level_after_task, DifficultyLev
 from ..theory.engine import TheoryAnswer
 
 
+# Task difficulty -> TaskResult difficulty
+DIFFICULTY_NORMALIZATION = {
+    "easy": "easy",
+    "middle": "middle",
+    "medium": "middle",
+    "hard": "hard",
+}
+
+
 def calculate_start_grade(
     years_of_experience: float,
     self_claimed_grade: str,
@@ -34,12 +46,9 @@ def calculate_start_grade(
             "resume_index": 2
         }
     """
-    exp_index = experience_to_grade_index(years_of_experience)
-    self_index = grade_to_index(self_claimed_grade)
-    resume_index = grade_to_index(resume_grade) if resume_grade else None
-    
-    start_index = calc_start_grade_index(exp_index, self_index, resume_index)
-    start_grade = index_to_grade(start_index)
+    start_grade, start_index, exp_index, self_index, resume_index = _start_grade(
+        years_of_experience, self_claimed_grade, resume_grade
+    )
     
     return {
         "start_grade": start_grade,
@@ -50,14 +59,86 @@ def calculate_start_grade(
     }
 
 
-def get_task_result_from_db(task: Task) -> TaskResult:
+@functools.lru_cache(maxsize=512)
+def _start_grade(
+    years_of_experience: float,
+    self_claimed_grade: str,
+    resume_grade: Optional[str]
+) -> tuple:
+    """Memoized part of calculate_start_grade; returns an immutable tuple."""
+    exp_index = experience_to_grade_index(years_of_experience)
+    self_index = grade_to_index(self_claimed_grade)
+    resume_index = grade_to_index(resume_grade) if resume_grade else None
+    
+    start_index = calc_start_grade_index(exp_index, self_index, resume_index)
+    return index_to_grade(start_index), start_index, exp_index, self_index, resume_index
+
+
+def get_last_submissions(db: Session, task_ids: List[int], *columns) -> Dict[int, Submission]:
+    """
+    Fetch only the latest submission of each task, in one query.
+    Only id, task_id and the given Submission columns are loaded.
+    Tasks without submissions are missing from the result.
+    """
+    if not task_ids:
+        return {}
+    latest_ids = (
+        db.query(func.max(Submission.id))
+        .filter(Submission.task_id.in_(task_ids))
+        .group_by(Submission.task_id)
+    )
+    submissions = (
+        db.query(Submission)
+        .options(load_only(Submission.id, Submission.task_id, *columns))
+        .filter(Submission.id.in_(latest_ids.scalar_subquery()))
+        .all()
+    )
+    return {s.task_id: s for s in submissions}
+
+
+def get_hint_counts(db: Session, task_ids: List[int]) -> Dict[int, Dict[str, int]]:
+    """
+    Count hints per task and level in the database (one GROUP BY query).
+    Tasks without hints are missing from the result.
+    """
+    if not task_ids:
+        return {}
+    rows = (
+        db.query(Hint.task_id, Hint.hint_level, func.count(Hint.id))
+        .filter(Hint.task_id.in_(task_ids))
+        .group_by(Hint.task_id, Hint.hint_level)
+        .all()
+    )
+    counts: Dict[int, Dict[str, int]] = {}
+    for task_id, level, count in rows:
+        counts.setdefault(task_id, {})[level] = count
+    return counts
+
+
+def count_task_hints(task: Task) -> Dict[str, int]:
+    """Count hints per level of an already loaded task, in one pass."""
+    counts: Dict[str, int] = {}
+    for h in task.hints:
+        counts[h.hint_level] = counts.get(h.hint_level, 0) + 1
+    return counts
+
+
+def get_task_result_from_db(
+    task: Task,
+    last_submission: Optional[Submission] = None,
+    hint_counts: Optional[Dict[str, int]] = None
+) -> TaskResult:
     """
     Convert database Task to TaskResult for grading.
+    last_submission is the task's latest submission (see get_last_submissions),
+    hint_counts its hints per level (see get_hint_counts); when hint_counts is
+    None the hints are counted from task.hints.
     """
-    # Count hints
-    hints_soft = sum(1 for h in task.hints if h.hint_level == "soft")
-    hints_medium = sum(1 for h in task.hints if h.hint_level == "medium")
-    hints_hard = sum(1 for h in task.hints if h.hint_level == "hard")
+    if hint_counts is None:
+        hint_counts = count_task_hints(task)
+    hints_soft = hint_counts.get("soft", 0)
+    hints_medium = hint_counts.get("medium", 0)
+    hints_hard = hint_counts.get("hard", 0)
     
     # Get test results from last submission
     visible_passed = 0
@@ -65,28 +146,25 @@ def get_task_result_from_db(task: Task) -> TaskResult:
     hidden_passed = 0
     hidden_total = 0
     
-    if task.submissions:
-        last_submission = task.submissions[-1]
+    if last_submission:
         # Parse test results
-        if hasattr(last_submission, 'test_results') and last_submission.test_results:
-            results = last_submission.test_results
+        results = getattr(last_submission, 'test_results', None)
+        if results:
             visible_passed = results.get('visible_passed', 0)
             visible_total = results.get('visible_total', 0)
             hidden_passed = results.get('hidden_passed', 0)
             hidden_total = results.get('hidden_total', 0)
     
     # Fallback to task's visible/hidden tests
-    if visible_total == 0 and task.visible_tests:
-        visible_total = len(task.visible_tests)
-    if hidden_total == 0 and task.hidden_tests:
-        hidden_total = len(task.hidden_tests)
+    visible_tests = task.visible_tests
+    hidden_tests = task.hidden_tests
+    if visible_total == 0 and visible_tests:
+        visible_total = len(visible_tests)
+    if hidden_total == 0 and hidden_tests:
+        hidden_total = len(hidden_tests)
     
-    # Normalize difficulty (medium -> middle)
-    normalized_difficulty = task.difficulty
-    if normalized_difficulty == "medium":
-        normalized_difficulty = "middle"
-    elif normalized_difficulty not in ["easy", "middle", "hard"]:
-        normalized_difficulty = "middle"  # Default fallback
+    # Normalize difficulty (medium -> middle, unknown -> middle)
+    normalized_difficulty = DIFFICULTY_NORMALIZATION.get(task.difficulty, "middle")
     
     return TaskResult(
         difficulty=normalized_difficulty,
@@ -109,26 +187,59 @@ def calculate_next_difficulty(
     """
     Calculate next task difficulty based on current task result.
     """
-    result = get_task_result_from_db(task)
+    last_submission = max(task.submissions, key=lambda s: s.id, default=None)
+    result = get_task_result_from_db(task, last_submission)
     return update_level_after_task(current_difficulty, result, user_clicked_next)
 
 
 def calculate_final_grade_for_interview(
     interview_id: int,
-    db: Session
+    db: Session,
+    *,
+    commit: bool = True
 ) -> dict:
     """
     Calculate final grade for completed interview.
     
+    With commit=False the results are only flushed, so a caller grading
+    several interviews can commit them all in one transaction.
+    
     Returns complete grade calculation with all metrics.
     """
-    interview = db.query(Interview).filter(Interview.id == interview_id).first()
+    # Identity-map lookup first (the report endpoint has usually loaded it
+    # already); otherwise only the columns grading reads are fetched
+    interview = db.get(
+        Interview,
+        interview_id,
+        options=[load_only(Interview.id, Interview.years_of_experience, Interview.selected_level)]
+    )
     if not interview:
         raise ValueError(f"Interview {interview_id} not found")
     
-    # Get all task results
-    tasks = db.query(Task).filter(Task.interview_id == interview_id).all()
-    task_results = [get_task_result_from_db(task) for task in tasks]
+    # Get all task results; hints are counted in SQL and only the latest
+    # submission of each task is fetched
+    tasks = (
+        db.query(Task)
+        .options(load_only(Task.id, Task.difficulty, Task.visible_tests, Task.hidden_tests))
+        .filter(Task.interview_id == interview_id)
+        .all()
+    )
+    task_ids = [task.id for task in tasks]
+    last_submissions = get_last_submissions(db, task_ids)
+    hint_counts = get_hint_counts(db, task_ids)
+    task_results = []
+    task_breakdown = []
+    for task in tasks:
+        r = get_task_result_from_db(task, last_submissions.get(task.id), hint_counts.get(task.id, {}))
+        task_results.append(r)
+        vp, vt, hp, ht = r.visible_passed, r.visible_total, r.hidden_passed, r.hidden_total
+        task_breakdown.append({
+            "difficulty": r.difficulty,
+            # Totals are non-negative counts, so "or 1" only replaces zero
+            "visible_rate": vp / (vt or 1),
+            "total_rate": (vp + hp) / ((vt + ht) or 1),
+            "hints_used": r.hints_soft + r.hints_medium + r.hints_hard
+        })
     
     # Get theory answers (if implemented)
     theory_answers = []  # TODO: implement theory questions
@@ -144,20 +255,15 @@ def calculate_final_grade_for_interview(
     # Update interview with results
     interview.overall_score = calc.overall_score
     interview.overall_grade = calc.final_grade
-    db.commit()
+    if commit:
+        db.commit()
+    else:
+        db.flush()
     
     return {
         **calc.to_dict(),
         "grade_progress": calc.get_grade_progress(),
-        "task_breakdown": [
-            {
-                "difficulty": r.difficulty,
-                "visible_rate": r.visible_passed / max(1, r.visible_total),
-                "total_rate": (r.visible_passed + r.hidden_passed) / max(1, r.visible_total + r.hidden_total),
-                "hints_used": r.hints_soft + r.hints_medium + r.hints_hard
-            }
-            for r in task_results
-        ]
+        "task_breakdown": task_breakdown
     }
 
 # пидормот
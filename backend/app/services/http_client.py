@@ -0,0 +1,19 @@
+"""
+Shared HTTP connection pool for SciBox.
+Every AsyncOpenAI client in the app uses it, so connections (and their TLS
+sessions) are kept alive and reused across services.
+"""
+import httpx
+
+from ..core.config import settings
+
+
+shared_http = httpx.AsyncClient(
+    timeout=httpx.Timeout(settings.LLM_TIMEOUT_S, connect=5.0),
+    limits=httpx.Limits(max_connections=128, max_keepalive_connections=64),
+)
+
+
+async def close_shared_http() -> None:
+    """Close pooled connections (application shutdown)."""
+    await shared_http.aclose()
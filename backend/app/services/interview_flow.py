@@ -3,12 +3,17 @@ Interview Flow Service - управление новым flow собеседов
 Этап 1: 3 задачи (easy → medium → hard)
 Этап 2: Теоретические вопросы (10-25, адаптивно)
 """
-import json
+import asyncio
+import functools
 import logging
+import os
+import re
+from datetime import datetime
 from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, defer, joinedload, load_only, selectinload
 
-from ..models.interview import Interview, Task, TheoryAnswer, Submission
+from ..models.interview import Interview, Task, TheoryAnswer, Submission, Hint, ChatMessage
 from ..prompts.task_selector import TASK_SELECTOR_SYSTEM, TASK_SELECTOR_USER
 from ..prompts.solution_questions import (
     SOLUTION_QUESTIONS_SYSTEM, SOLUTION_QUESTIONS_USER,
@@ -19,42 +24,78 @@ from ..prompts.theory_evaluator import (
     THEORY_ANSWER_EVALUATOR_SYSTEM, THEORY_ANSWER_EVALUATOR_USER,
     INTERVIEW_SCORER_SYSTEM, INTERVIEW_SCORER_USER
 )
-from .scibox_client import scibox_client
+from .scibox_client import scibox_client, strip_think_blocks, loads_json, dumps_json
+from .code_runner import precompile_tests
+from .grading_service import get_last_submissions
+from .task_pool import get_task_by_difficulty, get_task_sequence
 
 logger = logging.getLogger(__name__)
 
+# Outermost {...} in an LLM response
+_JSON_OBJECT_RE = re.compile(r'\{[\s\S]*\}')
+
 # Category mapping for directions
 DIRECTION_CATEGORIES = {
-    "backend": ["backend", "python", "fastapi", "sql", "sqlalchemy", "docker", "architecture", "async", "algorithms"],
-    "frontend": ["frontend", "algorithms"],
-    "fullstack": ["backend", "frontend", "sql", "docker", "algorithms"],
-    "ml": ["data-science", "python", "sql", "algorithms"],
-    "data-science": ["data-science", "python", "sql", "algorithms"],
-    "data-engineer": ["sql", "python", "docker", "airflow", "architecture"],
-    "devops": ["docker", "linux", "architecture"],
-    "algorithms": ["algorithms"],
-    "mobile": ["frontend", "algorithms"],
-    "go": ["go", "architecture", "sql", "docker", "algorithms"]
+    "backend": frozenset({"backend", "python", "fastapi", "sql", "sqlalchemy", "docker", "architecture", "async", "algorithms"}),
+    "frontend": frozenset({"frontend", "algorithms"}),
+    "fullstack": frozenset({"backend", "frontend", "sql", "docker", "algorithms"}),
+    "ml": frozenset({"data-science", "python", "sql", "algorithms"}),
+    "data-science": frozenset({"data-science", "python", "sql", "algorithms"}),
+    "data-engineer": frozenset({"sql", "python", "docker", "airflow", "architecture"}),
+    "devops": frozenset({"docker", "linux", "architecture"}),
+    "algorithms": frozenset({"algorithms"}),
+    "mobile": frozenset({"frontend", "algorithms"}),
+    "go": frozenset({"go", "architecture", "sql", "docker", "algorithms"})
 }
+DEFAULT_DIRECTION_CATEGORIES = frozenset({"algorithms"})
 
 
+@functools.lru_cache(maxsize=1)
 def load_questions_db() -> List[Dict[str, Any]]:
-    """Load questions from JSON file."""
-    import os
+    """
+    Load questions from JSON file.
+    Read once per process; callers share the list and must not mutate it.
+    """
     questions_path = os.path.join(
         os.path.dirname(__file__), 
         "../../../tasks_base/questions.json"
     )
-    with open(questions_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(questions_path, "rb") as f:
+        return loads_json(f.read())
 
 
 def filter_questions_for_direction(questions: List[Dict], direction: str) -> List[Dict]:
     """Filter questions relevant to the candidate's direction."""
-    categories = DIRECTION_CATEGORIES.get(direction, ["algorithms"])
+    categories = DIRECTION_CATEGORIES.get(direction, DEFAULT_DIRECTION_CATEGORIES)
     return [q for q in questions if q.get("category") in categories]
 
 
+@functools.lru_cache(maxsize=None)
+def _direction_index(direction: Optional[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Coding and theory questions relevant to a direction, filtered once.
+    direction is None for directions missing from DIRECTION_CATEGORIES.
+    """
+    questions = load_questions_db()
+    coding = [q for q in questions if q.get("type") == "coding" or q.get("category") == "algorithms"]
+    theory = [q for q in questions if q.get("type") == "theory"]
+    return {
+        "coding": filter_questions_for_direction(coding, direction),
+        "theory": filter_questions_for_direction(theory, direction),
+    }
+
+
+def get_direction_questions(direction: str, kind: str) -> List[Dict[str, Any]]:
+    """Cached "coding"/"theory" questions for a direction (shared list, do not mutate)."""
+    return _direction_index(direction if direction in DIRECTION_CATEGORIES else None)[kind]
+
+
+@functools.lru_cache(maxsize=1)
+def get_questions_by_id() -> Dict[Any, Dict[str, Any]]:
+    """All questions keyed by id (shared dict, do not mutate)."""
+    return {q["id"]: q for q in load_questions_db()}
+
+
 async def select_three_tasks(
     direction: str,
     level: str,
@@ -64,19 +105,15 @@ async def select_three_tasks(
     Select 3 appropriate tasks for the interview.
     Uses fast deterministic selection (no LLM) for quick start.
     """
-    questions = load_questions_db()
-    
-    # Filter coding questions for the direction
-    coding_questions = [
-        q for q in questions 
-        if q.get("type") == "coding" or q.get("category") == "algorithms"
-    ]
-    relevant_questions = filter_questions_for_direction(coding_questions, direction)
+    # Coding questions for the direction (copied, since it may be extended below)
+    relevant_questions = list(get_direction_questions(direction, "coding"))
     
     # If not enough relevant questions, add algorithms
     if len(relevant_questions) < 10:
+        questions = load_questions_db()
         algo_questions = [q for q in questions if q.get("category") == "algorithms"]
-        relevant_questions.extend([q for q in algo_questions if q not in relevant_questions])
+        seen_ids = {q["id"] for q in relevant_questions}
+        relevant_questions.extend(q for q in algo_questions if q["id"] not in seen_ids)
     
     # Use fast deterministic selection (no LLM call)
     return _fallback_task_selection(relevant_questions, level)
@@ -84,10 +121,13 @@ async def select_three_tasks(
 
 def _fallback_task_selection(questions: List[Dict], level: str) -> List[Dict]:
     """Fallback task selection without LLM."""
-    # Group by difficulty
-    easy = [q for q in questions if q.get("difficulty") == "easy"]
-    medium = [q for q in questions if q.get("difficulty") == "medium"]
-    hard = [q for q in questions if q.get("difficulty") == "hard"]
+    # Group by difficulty in one pass
+    buckets = {"easy": [], "medium": [], "hard": []}
+    for q in questions:
+        bucket = buckets.get(q.get("difficulty"))
+        if bucket is not None:
+            bucket.append(q)
+    easy, medium, hard = buckets["easy"], buckets["medium"], buckets["hard"]
     
     # Level-based selection
     level_mapping = {
@@ -129,9 +169,6 @@ async def generate_adaptive_task(
     
     NEW: Also generates generation_meta with selection_reason and opening_question.
     """
-    from .task_pool import get_task_by_difficulty
-    from datetime import datetime
-    
     # Get interview for candidate info
     interview = db.query(Interview).filter(Interview.id == interview_id).first()
     candidate_level = interview.selected_level if interview else "middle"
@@ -193,8 +230,8 @@ async def generate_adaptive_task(
         description=task_data["description"],
         difficulty=task_data["difficulty"],
         category=task_data.get("category", "algorithms"),
-        visible_tests=task_data.get("visible_tests", []),
-        hidden_tests=task_data.get("hidden_tests", []),
+        visible_tests=precompile_tests(task_data.get("visible_tests", [])),
+        hidden_tests=precompile_tests(task_data.get("hidden_tests", [])),
         max_score=100.0,
         status="active",
         generation_meta=generation_meta,
@@ -217,11 +254,9 @@ async def generate_adaptive_task(
             )
             
             # Clean any remaining <think> tags
-            import re
-            opening_question = re.sub(r'<think>.*?</think>', '', opening_question, flags=re.DOTALL).strip()
+            opening_question = strip_think_blocks(opening_question).strip()
             
             # Save as first chat message from bot
-            from ..models.interview import ChatMessage
             chat_message = ChatMessage(
                 interview_id=interview_id,
                 role="assistant",
@@ -251,10 +286,6 @@ async def create_interview_tasks(
     
     NEW: Also generates generation_meta for each task and opening question for first task.
     """
-    from .task_pool import get_task_sequence
-    from datetime import datetime
-    from ..models.interview import ChatMessage
-    
     # Get interview for context
     interview = db.query(Interview).filter(Interview.id == interview_id).first()
     
@@ -296,20 +327,20 @@ async def create_interview_tasks(
             description=task_data["description"],
             difficulty=task_data["difficulty"],
             category=task_data.get("category", "algorithms"),
-            visible_tests=task_data.get("visible_tests", []),
-            hidden_tests=task_data.get("hidden_tests", []),
+            visible_tests=precompile_tests(task_data.get("visible_tests", [])),
+            hidden_tests=precompile_tests(task_data.get("hidden_tests", [])),
             max_score=100.0,
             status="active" if i == 1 else "pending",
             generation_meta=generation_meta,
             source_type="from_pool"
         )
         
-        db.add(task)
         created_tasks.append(task)
     
+    db.add_all(created_tasks)
     db.commit()
-    for task in created_tasks:
-        db.refresh(task)
+    # Reload the expired tasks with one SELECT instead of a refresh per task
+    db.query(Task).filter(Task.interview_id == interview_id).all()
     
     # Generate opening question for the first task only
     if generate_opening_for_first and created_tasks:
@@ -447,16 +478,23 @@ async def generate_solution_questions(
     Generate questions about candidate's solutions (algorithm + complexity).
     For each solved task: 2 questions. For unsolved: skip and score 0.
     """
-    interview = db.query(Interview).filter(Interview.id == interview_id).first()
-    tasks = db.query(Task).filter(Task.interview_id == interview_id).order_by(Task.task_order).all()
+    # Tests, generation meta etc. are not needed here (final_code is only written)
+    tasks = db.query(Task).options(
+        load_only(Task.id, Task.task_order, Task.title, Task.description, Task.status)
+    ).filter(Task.interview_id == interview_id).order_by(Task.task_order).all()
+    
+    # Latest submission of every task in one query
+    best_submissions = get_last_submissions(
+        db, [task.id for task in tasks],
+        Submission.code,
+        Submission.passed_visible, Submission.total_visible,
+        Submission.passed_hidden, Submission.total_hidden
+    )
     
     # Build tasks and solutions summary for LLM
     tasks_and_solutions = []
     for task in tasks:
-        # Get best submission
-        best_submission = db.query(Submission).filter(
-            Submission.task_id == task.id
-        ).order_by(Submission.created_at.desc()).first()
+        best_submission = best_submissions.get(task.id)
         
         is_solved = task.status == "completed" or (
             best_submission and 
@@ -478,114 +516,98 @@ async def generate_solution_questions(
         # Save final code to task
         if best_submission:
             task.final_code = best_submission.code
-            db.commit()
     
-    # Format for LLM
-    formatted_tasks = "\n\n".join([
-        f"Задача {t['task_order']}: {t['title']}\n"
-        f"Описание: {t['description']}\n"
-        f"Решена: {'Да' if t['solved'] else 'Нет'}\n"
-        f"Код решения:\n```\n{t['code']}\n```" if t['solved'] else f"Код: Не решена"
-        for t in tasks_and_solutions
-    ])
+    if best_submissions:
+        db.commit()
     
-    # Call LLM to generate questions
-    messages = [
-        {"role": "system", "content": SOLUTION_QUESTIONS_SYSTEM},
-        {"role": "user", "content": SOLUTION_QUESTIONS_USER.format(
-            tasks_and_solutions=formatted_tasks
-        )}
-    ]
+    # One LLM call per solved task, all in flight at once (unsolved tasks need none)
+    solved_tasks = [t for t in tasks_and_solutions if t["solved"]]
+    generated = await asyncio.gather(
+        *[_generate_task_questions(t) for t in solved_tasks],
+        return_exceptions=True
+    )
+    questions_by_task = {t["task_id"]: qs for t, qs in zip(solved_tasks, generated)}
     
     created_questions = []
     question_order = 1
     
-    try:
-        response = await scibox_client.chat_completion(messages, temperature=0.3, max_tokens=2048)
-        import re
-        response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL).strip()
-        json_match = re.search(r'\{[\s\S]*\}', response)
+    for t in tasks_and_solutions:
+        task_id = t["task_id"]
         
-        if json_match:
-            result = json.loads(json_match.group())
-            
-            for task_q in result.get("task_questions", []):
-                task_id = task_q.get("task_id")
-                solved = task_q.get("solved", False)
-                
-                if not solved:
-                    # Create skipped questions with 0 score
-                    for q_type in ["algorithm", "complexity"]:
-                        theory_answer = TheoryAnswer(
-                            interview_id=interview_id,
-                            question_type=f"solution_{q_type}",
-                            question_text=f"Вопрос о {'алгоритме' if q_type == 'algorithm' else 'сложности'} решения задачи",
-                            related_task_id=task_id,
-                            question_order=question_order,
-                            status="skipped",
-                            score=0
-                        )
-                        db.add(theory_answer)
-                        created_questions.append(theory_answer)
-                        question_order += 1
-                else:
-                    # Create actual questions for solved tasks
-                    for q in task_q.get("questions", []):
-                        theory_answer = TheoryAnswer(
-                            interview_id=interview_id,
-                            question_type=f"solution_{q.get('type', 'algorithm')}",
-                            question_text=q.get("question", ""),
-                            reference_answer=q.get("reference_answer", ""),
-                            evaluation_details={"key_points": q.get("key_points", [])},
-                            related_task_id=task_id,
-                            question_order=question_order,
-                            status="pending"
-                        )
-                        db.add(theory_answer)
-                        created_questions.append(theory_answer)
-                        question_order += 1
+        if not t["solved"]:
+            # Create skipped questions with 0 score
+            for q_type in ["algorithm", "complexity"]:
+                created_questions.append(TheoryAnswer(
+                    interview_id=interview_id,
+                    question_type=f"solution_{q_type}",
+                    question_text=f"Вопрос о {'алгоритме' if q_type == 'algorithm' else 'сложности'} решения задачи",
+                    related_task_id=task_id,
+                    question_order=question_order,
+                    status="skipped",
+                    score=0
+                ))
+                question_order += 1
+            continue
         
-        db.commit()
+        task_questions = questions_by_task[task_id]
+        generic = isinstance(task_questions, Exception) or not task_questions
+        if generic:
+            logger.error(f"Failed to generate solution questions for task {task_id}: {task_questions}")
+            # Fallback: generic questions for this task
+            task_questions = [
+                {"type": "algorithm", "question": f"Объясните алгоритм вашего решения задачи '{t['title']}'"},
+                {"type": "complexity", "question": f"Какова временная и пространственная сложность вашего решения задачи '{t['title']}'?"}
+            ]
         
-    except Exception as e:
-        logger.error(f"Failed to generate solution questions: {e}")
-        # Fallback: create generic questions
-        for task in tasks:
-            is_solved = task.status == "completed"
-            
-            # Algorithm question
-            theory_answer = TheoryAnswer(
-                interview_id=interview_id,
-                question_type="solution_algorithm",
-                question_text=f"Объясните алгоритм вашего решения задачи '{task.title}'",
-                related_task_id=task.id,
-                question_order=question_order,
-                status="skipped" if not is_solved else "pending",
-                score=0 if not is_solved else None
-            )
-            db.add(theory_answer)
-            created_questions.append(theory_answer)
-            question_order += 1
-            
-            # Complexity question
-            theory_answer = TheoryAnswer(
+        for q in task_questions:
+            created_questions.append(TheoryAnswer(
                 interview_id=interview_id,
-                question_type="solution_complexity",
-                question_text=f"Какова временная и пространственная сложность вашего решения задачи '{task.title}'?",
-                related_task_id=task.id,
+                question_type=f"solution_{q.get('type', 'algorithm')}",
+                question_text=q.get("question", ""),
+                reference_answer=None if generic else q.get("reference_answer", ""),
+                evaluation_details=None if generic else {"key_points": q.get("key_points", [])},
+                related_task_id=task_id,
                 question_order=question_order,
-                status="skipped" if not is_solved else "pending",
-                score=0 if not is_solved else None
-            )
-            db.add(theory_answer)
-            created_questions.append(theory_answer)
+                status="pending"
+            ))
             question_order += 1
-        
-        db.commit()
+    
+    # One flush for all rows: SQLAlchemy batches same-table INSERTs
+    db.add_all(created_questions)
+    db.commit()
     
     return created_questions
 
 
+async def _generate_task_questions(task_solution: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Ask the LLM for the algorithm/complexity questions of one solved task."""
+    formatted_task = (
+        f"Задача {task_solution['task_order']}: {task_solution['title']}\n"
+        f"Описание: {task_solution['description']}\n"
+        f"Решена: Да\n"
+        f"Код решения:\n```\n{task_solution['code']}\n```"
+    )
+    messages = [
+        {"role": "system", "content": SOLUTION_QUESTIONS_SYSTEM},
+        {"role": "user", "content": SOLUTION_QUESTIONS_USER.format(
+            tasks_and_solutions=formatted_task
+        )}
+    ]
+    
+    response = await scibox_client.cached_chat_completion(messages, temperature=0.3, max_tokens=1024)
+    response = strip_think_blocks(response).strip()
+    json_match = _JSON_OBJECT_RE.search(response)
+    if not json_match:
+        return []
+    
+    result = loads_json(json_match.group())
+    return [
+        q
+        for task_q in result.get("task_questions", [])
+        for q in task_q.get("questions", [])
+    ]
+
+
 async def get_next_theory_question(
     interview_id: int,
     db: Session
@@ -596,8 +618,17 @@ async def get_next_theory_question(
     """
     interview = db.query(Interview).filter(Interview.id == interview_id).first()
     
-    # Get all answers so far
-    all_answers = db.query(TheoryAnswer).filter(
+    # Get all answers so far (plain rows, no ORM objects needed here)
+    all_answers = db.query(
+        TheoryAnswer.id,
+        TheoryAnswer.status,
+        TheoryAnswer.score,
+        TheoryAnswer.question_id,
+        TheoryAnswer.question_order,
+        TheoryAnswer.question_type,
+        TheoryAnswer.question_text,
+        TheoryAnswer.related_task_id
+    ).filter(
         TheoryAnswer.interview_id == interview_id
     ).order_by(TheoryAnswer.question_order).all()
     
@@ -641,18 +672,28 @@ async def get_next_theory_question(
     
     # Get asked question IDs
     asked_ids = [a.question_id for a in all_answers if a.question_id]
+    asked_set = set(asked_ids)
     
-    # Load theory questions for direction
-    questions = load_questions_db()
-    theory_questions = [
-        q for q in questions 
-        if q.get("type") == "theory" and q["id"] not in asked_ids
+    # Theory questions for direction that were not asked yet
+    relevant_questions = [
+        q for q in get_direction_questions(interview.direction, "theory")
+        if q["id"] not in asked_set
     ]
-    relevant_questions = filter_questions_for_direction(theory_questions, interview.direction)
     
     if not relevant_questions:
         return None  # No more questions
     
+    # all_answers is ordered by question_order, so the last one holds the max
+    next_order = all_answers[-1].question_order + 1 if all_answers else 1
+    
+    # Few candidates left or confidence already settled: a deterministic pick
+    # is as good as the LLM's, skip the round-trip
+    if len(relevant_questions) <= 3 or interview.confidence_score > 85:
+        last_theory = next((a for a in reversed(all_answers) if a.question_type == "theory"), None)
+        last_category = get_questions_by_id().get(last_theory.question_id, {}).get("category") if last_theory else None
+        question = _pick_theory_question(relevant_questions, avg_score, last_category)
+        return _add_theory_question(db, interview_id, question, next_order, len(answered), max_questions)
+    
     # Use LLM to select next question
     messages = [
         {"role": "system", "content": THEORY_SELECTOR_SYSTEM},
@@ -664,81 +705,103 @@ async def get_next_theory_question(
             question_number=len(answered) + 1,
             max_questions=max_questions,
             asked_question_ids=str(asked_ids),
-            available_questions=json.dumps(relevant_questions[:30], ensure_ascii=False)
+            available_questions=dumps_json([_selector_view(q) for q in relevant_questions[:30]])
         )}
     ]
     
     try:
-        response = await scibox_client.chat_completion(messages, temperature=0.3, max_tokens=512)
-        import re
-        response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL).strip()
-        json_match = re.search(r'\{[\s\S]*\}', response)
+        response = await scibox_client.cached_chat_completion(messages, temperature=0.3, max_tokens=512)
+        response = strip_think_blocks(response).strip()
+        json_match = _JSON_OBJECT_RE.search(response)
         
         if json_match:
-            result = json.loads(json_match.group())
+            result = loads_json(json_match.group())
             
             if not result.get("should_continue", True):
                 return None  # LLM decided to stop
             
-            question_id = result.get("question_id")
-            question = next((q for q in questions if q["id"] == question_id), None)
+            question = get_questions_by_id().get(result.get("question_id"))
             
             if question:
-                # Create theory answer record
-                next_order = max([a.question_order for a in all_answers], default=0) + 1
-                theory_answer = TheoryAnswer(
-                    interview_id=interview_id,
-                    question_id=question_id,
-                    question_type="theory",
-                    question_text=question["question"],
-                    question_order=next_order,
-                    status="pending"
-                )
-                db.add(theory_answer)
-                db.commit()
-                db.refresh(theory_answer)
-                
-                return {
-                    "id": theory_answer.id,
-                    "question_order": theory_answer.question_order,
-                    "question_type": "theory",
-                    "question_text": question["question"],
-                    "category": question.get("category"),
-                    "difficulty": question.get("difficulty"),
-                    "total_answered": len(answered),
-                    "max_questions": max_questions
-                }
+                return _add_theory_question(db, interview_id, question, next_order, len(answered), max_questions)
     
     except Exception as e:
         logger.error(f"Failed to select theory question: {e}")
     
     # Fallback: return first available question
-    if relevant_questions:
-        q = relevant_questions[0]
-        next_order = max([a.question_order for a in all_answers], default=0) + 1
-        theory_answer = TheoryAnswer(
-            interview_id=interview_id,
-            question_id=q["id"],
-            question_type="theory",
-            question_text=q["question"],
-            question_order=next_order,
-            status="pending"
-        )
-        db.add(theory_answer)
-        db.commit()
-        db.refresh(theory_answer)
-        
-        return {
-            "id": theory_answer.id,
-            "question_order": theory_answer.question_order,
-            "question_type": "theory",
-            "question_text": q["question"],
-            "category": q.get("category"),
-            "total_answered": len(answered),
-            "max_questions": max_questions
-        }
+    return _add_theory_question(db, interview_id, relevant_questions[0], next_order, len(answered), max_questions)
+
+
+def _selector_view(question: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    What the theory selector needs to choose a question: no reference answer,
+    question text trimmed to a topic hint (keeps the prompt small).
+    """
+    view = {
+        "id": question["id"],
+        "category": question.get("category"),
+        "difficulty": question.get("difficulty"),
+        "question": question["question"][:80]
+    }
+    if question.get("topic"):
+        view["topic"] = question["topic"]
+    return view
+
+
+def _pick_theory_question(
+    questions: List[Dict[str, Any]],
+    avg_score: float,
+    last_category: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Deterministic theory question pick: difficulty follows the average score,
+    and the category of the previous question is avoided when possible.
+    """
+    if avg_score >= 75:
+        target_difficulty = "hard"
+    elif avg_score < 45:
+        target_difficulty = "easy"
+    else:
+        target_difficulty = "medium"
     
-    return None
+    same_difficulty = [q for q in questions if q.get("difficulty") == target_difficulty] or questions
+    return next(
+        (q for q in same_difficulty if q.get("category") != last_category),
+        same_difficulty[0]
+    )
+
+
+def _add_theory_question(
+    db: Session,
+    interview_id: int,
+    question: Dict[str, Any],
+    question_order: int,
+    total_answered: int,
+    max_questions: int
+) -> Dict[str, Any]:
+    """Create the pending TheoryAnswer for a selected question and describe it for the API."""
+    theory_answer = TheoryAnswer(
+        interview_id=interview_id,
+        question_id=question["id"],
+        question_type="theory",
+        question_text=question["question"],
+        question_order=question_order,
+        status="pending"
+    )
+    db.add(theory_answer)
+    db.commit()
+    db.refresh(theory_answer)
+    
+    return {
+        "id": theory_answer.id,
+        "question_order": theory_answer.question_order,
+        "question_type": "theory",
+        "question_text": question["question"],
+        "category": question.get("category"),
+        "difficulty": question.get("difficulty"),
+        "total_answered": total_answered,
+        "max_questions": max_questions
+    }
 
 
 async def evaluate_theory_answer(
@@ -750,11 +813,12 @@ async def evaluate_theory_answer(
     Evaluate candidate's answer to a theory question.
     Updates confidence score based on result.
     """
-    theory_answer = db.query(TheoryAnswer).filter(TheoryAnswer.id == answer_id).first()
+    # Answer and its interview in one SELECT; no SQL at all if the caller already loaded them
+    theory_answer = db.get(TheoryAnswer, answer_id, options=[joinedload(TheoryAnswer.interview)])
     if not theory_answer:
         raise ValueError(f"Answer {answer_id} not found")
     
-    interview = db.query(Interview).filter(Interview.id == theory_answer.interview_id).first()
+    interview = theory_answer.interview
     
     # Prepare evaluation prompt
     if theory_answer.question_type.startswith("solution_"):
@@ -786,17 +850,15 @@ async def evaluate_theory_answer(
     
     try:
         response = await scibox_client.chat_completion(messages, temperature=0.2, max_tokens=1024)
-        import re
-        response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL).strip()
-        json_match = re.search(r'\{[\s\S]*\}', response)
+        response = strip_think_blocks(response).strip()
+        json_match = _JSON_OBJECT_RE.search(response)
         
         if json_match:
-            evaluation = json.loads(json_match.group())
+            evaluation = loads_json(json_match.group())
     except Exception as e:
         logger.error(f"Failed to evaluate answer: {e}")
     
     # Update theory answer
-    from datetime import datetime
     theory_answer.candidate_answer = candidate_answer
     theory_answer.score = evaluation.get("score", 50)
     theory_answer.correctness = evaluation.get("correctness", 50)
@@ -805,8 +867,18 @@ async def evaluate_theory_answer(
     theory_answer.status = "answered"
     theory_answer.answered_at = datetime.utcnow()
     
-    # Update interview confidence score
-    _update_confidence_score(interview, evaluation.get("score", 50), db)
+    # Update interview confidence score: other scored answers + this one
+    scores = [
+        score for (score,) in db.query(TheoryAnswer.score).filter(
+            TheoryAnswer.interview_id == interview.id,
+            TheoryAnswer.id != theory_answer.id,
+            TheoryAnswer.score.isnot(None),
+            TheoryAnswer.status == "answered"
+        )
+    ]
+    if theory_answer.score is not None:  # no grade from the LLM: not counted
+        scores.append(theory_answer.score)
+    _update_confidence_score(interview, scores)
     
     db.commit()
     
@@ -817,19 +889,14 @@ async def evaluate_theory_answer(
     }
 
 
-def _update_confidence_score(interview: Interview, new_score: float, db: Session):
-    """Update interview confidence score based on answer pattern."""
-    # Get all scored answers
-    scored_answers = db.query(TheoryAnswer).filter(
-        TheoryAnswer.interview_id == interview.id,
-        TheoryAnswer.score.isnot(None),
-        TheoryAnswer.status == "answered"
-    ).all()
-    
-    if not scored_answers:
+def _update_confidence_score(interview: Interview, scores: List[float]):
+    """
+    Update interview confidence score based on answer pattern.
+    scores are all scored answers of the interview; the caller commits.
+    """
+    if not scores:
         return
     
-    scores = [a.score for a in scored_answers]
     avg_score = sum(scores) / len(scores)
     
     # Level expectation mapping
@@ -852,17 +919,27 @@ def _update_confidence_score(interview: Interview, new_score: float, db: Session
     
     # Combined confidence
     interview.confidence_score = (consistency * 0.4 + level_match * 0.6)
-    
-    db.commit()
 
 
 async def generate_final_scores(interview_id: int, db: Session) -> Dict[str, Any]:
     """
     Generate final interview scores and assessment.
     """
-    interview = db.query(Interview).filter(Interview.id == interview_id).first()
-    tasks = db.query(Task).filter(Task.interview_id == interview_id).all()
-    answers = db.query(TheoryAnswer).filter(TheoryAnswer.interview_id == interview_id).all()
+    # Only the columns the summaries read; code, tests, CV and evaluation JSON stay in the DB
+    interview = db.get(Interview, interview_id, options=[
+        defer(Interview.cv_text),
+        defer(Interview.cv_analysis),
+        selectinload(Interview.tasks).load_only(
+            Task.id, Task.task_order, Task.title, Task.difficulty, Task.status, Task.actual_score
+        ),
+        selectinload(Interview.theory_answers).load_only(
+            TheoryAnswer.id, TheoryAnswer.question_type, TheoryAnswer.question_order,
+            TheoryAnswer.question_text, TheoryAnswer.candidate_answer,
+            TheoryAnswer.score, TheoryAnswer.status
+        )
+    ])
+    tasks = interview.tasks
+    answers = interview.theory_answers
     
     # Prepare summaries
     tasks_summary = "\n".join([
@@ -873,30 +950,38 @@ async def generate_final_scores(interview_id: int, db: Session) -> Dict[str, Any
         for t in tasks
     ])
     
-    solution_answers = [a for a in answers if a.question_type.startswith("solution_")]
-    theory_answers_list = [a for a in answers if a.question_type == "theory"]
-    
-    solution_summary = "\n".join([
-        f"Вопрос {a.question_order}: {a.question_text[:50]}...\n"
-        f"  Ответ: {(a.candidate_answer or 'Пропущен')[:100]}...\n"
-        f"  Балл: {a.score or 0}"
-        for a in solution_answers if a.status == "answered"
-    ])
-    
-    theory_summary = "\n".join([
-        f"Вопрос {a.question_order}: {a.question_text[:50]}...\n"
-        f"  Ответ: {(a.candidate_answer or 'Пропущен')[:100]}...\n"
-        f"  Балл: {a.score or 0}"
-        for a in theory_answers_list if a.status == "answered"
-    ])
+    # Answered solution/theory questions, split and formatted in one pass
+    solution_lines = []
+    theory_lines = []
+    for a in answers:
+        if a.status != "answered":
+            continue
+        if a.question_type.startswith("solution_"):
+            lines = solution_lines
+        elif a.question_type == "theory":
+            lines = theory_lines
+        else:
+            continue
+        answer_text = a.candidate_answer[:100] if a.candidate_answer else "Пропущен"
+        lines.append(
+            f"Вопрос {a.question_order}: {a.question_text[:50]}...\n"
+            f"  Ответ: {answer_text}...\n"
+            f"  Балл: {a.score or 0}"
+        )
+    solution_summary = "\n".join(solution_lines)
+    theory_summary = "\n".join(theory_lines)
     
     # Stats
-    solved_tasks = len([t for t in tasks if t.status == "completed"])
-    total_attempts = sum([
-        db.query(Submission).filter(Submission.task_id == t.id).count()
-        for t in tasks
-    ])
-    hints_used = sum([len(t.hints) for t in tasks])
+    solved_tasks = sum(1 for t in tasks if t.status == "completed")
+    total_attempts = 0
+    hints_used = 0
+    if tasks:
+        # Submission and hint counts in one round-trip instead of a hints load per task
+        task_ids = [t.id for t in tasks]
+        total_attempts, hints_used = db.query(
+            select(func.count(Submission.id)).where(Submission.task_id.in_(task_ids)).scalar_subquery(),
+            select(func.count(Hint.id)).where(Hint.task_id.in_(task_ids)).scalar_subquery()
+        ).one()
     
     # Call LLM for final assessment
     messages = [
@@ -918,12 +1003,11 @@ async def generate_final_scores(interview_id: int, db: Session) -> Dict[str, Any
     
     try:
         response = await scibox_client.chat_completion(messages, temperature=0.2, max_tokens=2048)
-        import re
-        response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL).strip()
-        json_match = re.search(r'\{[\s\S]*\}', response)
+        response = strip_think_blocks(response).strip()
+        json_match = _JSON_OBJECT_RE.search(response)
         
         if json_match:
-            result = json.loads(json_match.group())
+            result = loads_json(json_match.group())
             
             # Update interview with scores
             scores = result.get("scores", {})
@@ -936,7 +1020,6 @@ async def generate_final_scores(interview_id: int, db: Session) -> Dict[str, Any
             interview.status = "completed"
             interview.current_stage = "completed"
             
-            from datetime import datetime
             interview.completed_at = datetime.utcnow()
             
             db.commit()
@@ -0,0 +1,257 @@
+"""
+Judge pool - persistent worker interpreters for candidate code.
+
+Submissions are executed in long-lived judge_worker subprocesses instead of
+the API process. Workers are reused across submissions, which lets a PyPy
+interpreter (CODE_RUNNER_PYTHON=pypy3) keep its JIT traces warm while the
+FastAPI server itself stays on CPython.
+"""
+import json
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Directory that contains the `app` package (worker is started with -m)
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+# error_message prefix of a run cut short by the wall-clock timeout
+TIME_LIMIT_ERROR = "Time Limit Exceeded"
+
+# Small pure-Python loop run once per worker so the JIT has traces before real traffic
+WARMUP_REQUEST = {
+    "code": "def solution(n):\n    total = 0\n    for i in range(n):\n        total += i\n    return total\n",
+    "language": "python",
+    "visible_tests": [{"input": "100000", "expected_output": "4999950000"}],
+    "hidden_tests": [{"input": "100000", "expected_output": "4999950000"}],
+}
+
+
+def _worker_env() -> Dict[str, str]:
+    """
+    Minimal environment for workers: candidate code must not see the API's
+    secrets (SCIBOX_API_KEY, database credentials) through os.environ.
+    """
+    env = {
+        "PATH": os.environ.get("PATH", os.defpath),
+        # The protocol is UTF-8 JSON regardless of the (now unset) locale
+        "PYTHONIOENCODING": "utf-8",
+    }
+    if os.environ.get("PYTHONPATH"):
+        env["PYTHONPATH"] = os.environ["PYTHONPATH"]
+    return env
+
+
+class JudgeWorker:
+    """One judge_worker subprocess with a background stdout reader."""
+    
+    def __init__(self, python: str, cpu_seconds: int, memory_mb: int):
+        self.process = subprocess.Popen(
+            [
+                python, "-u", "-m", "app.services.judge_worker",
+                "--cpu-seconds", str(cpu_seconds),
+                "--memory-mb", str(memory_mb)
+            ],
+            cwd=BACKEND_ROOT,
+            env=_worker_env(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8"
+        )
+        self._lines: "queue.Queue[str]" = queue.Queue()
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+    
+    def _read_stdout(self):
+        for line in self.process.stdout:
+            self._lines.put(line)
+        # EOF: the worker exited (e.g. killed by its CPU limit)
+        self._lines.put(None)
+    
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+    
+    def send(self, payload: Dict[str, Any]):
+        """Write one request line."""
+        self.process.stdin.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        self.process.stdin.flush()
+    
+    def read_message(self, timeout_s: float) -> Dict[str, Any]:
+        """Read the next protocol line. Raises TimeoutError, or OSError if the worker died."""
+        try:
+            line = self._lines.get(timeout=max(0.0, timeout_s))
+        except queue.Empty:
+            raise TimeoutError(f"No response within {timeout_s} s")
+        if line is None:
+            raise OSError("Judge worker exited")
+        return json.loads(line)
+    
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+
+
+class JudgePool:
+    """Fixed-size pool of warm judge workers, safe to use from several threads."""
+    
+    def __init__(self, python: str, size: int, timeout_s: float, memory_mb: int = 0):
+        self.python = python
+        self.timeout_s = timeout_s
+        self.memory_mb = memory_mb
+        # CPU budget per submission; the wall-clock timeout stays the hard ceiling
+        self.cpu_seconds = max(1, int(timeout_s + 0.999))
+        # An idle slot is a live worker, or None when a replacement could not be
+        # started; None slots are refilled at checkout
+        self._idle: "queue.Queue[Optional[JudgeWorker]]" = queue.Queue()
+        for _ in range(max(1, size)):
+            self._idle.put(self._spawn())
+    
+    def _spawn(self) -> JudgeWorker:
+        worker = JudgeWorker(self.python, self.cpu_seconds, self.memory_mb)
+        worker.send(WARMUP_REQUEST)
+        try:
+            while worker.read_message(self.timeout_s)["kind"] != "result":
+                pass
+        except TimeoutError:
+            # Still busy with the warm-up: its pending lines would be read as the
+            # next submission's results. Start a clean worker, just not warmed up
+            logger.warning("Judge worker warm-up exceeded %s s, starting it cold", self.timeout_s)
+            worker.kill()
+            worker = JudgeWorker(self.python, self.cpu_seconds, self.memory_mb)
+        return worker
+    
+    def run_code(
+        self,
+        code: str,
+        language: str,
+        visible_tests: List[Dict[str, Any]],
+        hidden_tests: List[Dict[str, Any]],
+        early_exit: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Run a submission on an idle worker, collecting per-test results as
+        they stream in. A worker that misses the deadline is killed and
+        replaced; tests it did not finish are reported as timed out.
+        """
+        worker = self._idle.get()
+        visible_done: List[Dict[str, Any]] = []
+        hidden_passed = 0
+        try:
+            if worker is None or not worker.is_alive():
+                worker = None
+                worker = self._spawn()
+            deadline = time.monotonic() + self.timeout_s
+            try:
+                worker.send({
+                    "code": code,
+                    "language": language,
+                    "visible_tests": visible_tests,
+                    "hidden_tests": hidden_tests,
+                    "early_exit": early_exit
+                })
+                while True:
+                    message = worker.read_message(deadline - time.monotonic())
+                    if message["kind"] == "result":
+                        return message["result"]
+                    if message["kind"] == "visible":
+                        visible_done.append(message["test"])
+                    elif message["test"]["passed"]:
+                        hidden_passed += 1
+            except (TimeoutError, OSError):
+                worker.kill()
+                return self._timeout_result(visible_tests, hidden_tests, visible_done, hidden_passed)
+        finally:
+            self._release(worker)
+    
+    def _release(self, worker: Optional[JudgeWorker]):
+        """Return the slot to the pool; a dead worker is replaced, never requeued."""
+        if worker is not None and not worker.is_alive():
+            try:
+                worker = self._spawn()
+            except Exception:
+                # The empty slot is retried at its next checkout
+                logger.exception("Judge worker restart failed")
+                worker = None
+        self._idle.put(worker)
+    
+    def _timeout_result(
+        self,
+        visible_tests: List[Dict[str, Any]],
+        hidden_tests: List[Dict[str, Any]],
+        visible_done: List[Dict[str, Any]],
+        hidden_passed: int
+    ) -> Dict[str, Any]:
+        error = f"{TIME_LIMIT_ERROR}: {self.timeout_s} s"
+        details = visible_done + [
+            {
+                "passed": False,
+                "actual": None,
+                "error": error,
+                "index": i + 1,
+                "input": test.get("input"),
+                "expected": test.get("expected_output") or test.get("expected"),
+                "description": test.get("description", "")
+            }
+            for i, test in enumerate(visible_tests) if i >= len(visible_done)
+        ]
+        return {
+            "passed_visible": sum(1 for d in visible_done if d["passed"]),
+            "total_visible": len(visible_tests),
+            "passed_hidden": hidden_passed,
+            "total_hidden": len(hidden_tests),
+            "execution_time_ms": self.timeout_s * 1000,
+            "error_message": error,
+            "visible_test_details": details
+        }
+    
+    def shutdown(self):
+        """Kill all idle workers (called on application shutdown)."""
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.kill()
+
+
+_pool: Optional[JudgePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_judge_pool() -> Optional[JudgePool]:
+    """
+    Return the shared pool, or None when out-of-process execution is disabled
+    (CODE_RUNNER_PYTHON is empty). The pool is a process-wide singleton
+    started at application startup, so workers stay warm across requests.
+    """
+    global _pool
+    if _pool is None:
+        # Imported lazily so judge_worker's import chain stays stdlib-only
+        from ..core.config import settings
+        if not settings.CODE_RUNNER_PYTHON:
+            return None
+        with _pool_lock:
+            if _pool is None:
+                _pool = JudgePool(
+                    python=settings.CODE_RUNNER_PYTHON,
+                    size=settings.CODE_RUNNER_WORKERS,
+                    timeout_s=settings.CODE_RUNNER_TIMEOUT_S,
+                    memory_mb=settings.CODE_RUNNER_MEMORY_MB
+                )
+    return _pool
+
+
+def shutdown_judge_pool():
+    """Stop the shared pool's workers if it was started."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,104 @@
+"""
+Judge worker process.
+Long-lived interpreter that executes candidate submissions for the judge pool.
+
+Imports only the standard library and code_runner, so it can be started
+under PyPy as well as CPython:
+
+    pypy3 -u -m app.services.judge_worker
+
+Protocol: one JSON request per stdin line. For every request the worker
+writes one {"kind": "visible"|"hidden", "test": ...} line per finished test
+and then a final {"kind": "result", "result": ...} line, so the pool keeps
+partial results when it has to kill a worker on timeout.
+
+Each worker caps its address space (--memory-mb) once at startup and its
+CPU time (--cpu-seconds) per request, so runaway candidate code is stopped
+by the kernel even if the pool's wall-clock timeout is generous.
+"""
+import argparse
+import json
+import sys
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from .code_runner import run_code_in_process
+
+
+def _limit_memory(memory_mb: int):
+    """Cap the worker's address space; 0 disables the limit."""
+    if resource is None or memory_mb <= 0:
+        return
+    limit = memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _limit_cpu(cpu_seconds: int):
+    """
+    Allow cpu_seconds more CPU time from now. RLIMIT_CPU counts the whole
+    process lifetime, so the soft limit is moved forward before every request.
+    """
+    if resource is None or cpu_seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+
+
+def main():
+    """Serve run_code requests until stdin is closed."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cpu-seconds", type=int, default=0)
+    parser.add_argument("--memory-mb", type=int, default=0)
+    limits = parser.parse_args()
+    _limit_memory(limits.memory_mb)
+    
+    # Candidate print() calls must not corrupt the protocol stream
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+    
+    def emit(message):
+        protocol_out.write(json.dumps(message, ensure_ascii=False, default=repr) + "\n")
+        protocol_out.flush()
+    
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        _limit_cpu(limits.cpu_seconds)
+        request = {}
+        try:
+            request = json.loads(line)
+            result = run_code_in_process(
+                code=request["code"],
+                language=request["language"],
+                visible_tests=request["visible_tests"],
+                hidden_tests=request["hidden_tests"],
+                on_test=lambda kind, test_result: emit({"kind": kind, "test": test_result}),
+                early_exit=request.get("early_exit", False)
+            )
+        except Exception as e:
+            # Same shape as a normal result, callers index the counters
+            result = {
+                "passed_visible": 0,
+                "total_visible": len(request.get("visible_tests") or []),
+                "passed_hidden": 0,
+                "total_hidden": len(request.get("hidden_tests") or []),
+                "execution_time_ms": None,
+                "error_message": f"Runtime Error: {str(e)}",
+                "visible_test_details": []
+            }
+        
+        emit({"kind": "result", "result": result})
+
+
+if __name__ == "__main__":
+    main()
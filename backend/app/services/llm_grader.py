@@ -1,16 +1,25 @@
 """
 LLM-based answer grading service using SciBox.
 """
-import json
-from openai import OpenAI
-
 from app.core.config import settings
+from app.services.scibox_client import scibox_client, loads_json
 
 
-# Initialize SciBox client
-client = OpenAI(
-    api_key=settings.SCIBOX_API_KEY,
-    base_url=settings.SCIBOX_BASE_URL,
+GRADER_SYSTEM_PROMPT = (
+    "/no_think "
+    "Ты — автоматический проверяющий решений на техническом собеседовании. "
+    "Твоя задача — оценить решение кандидата по заданию, выставить балл от 0 до 100 "
+    "и кратко пояснить основные ошибки. "
+    "Если решение в целом верное, но есть небольшие недочёты — выставь 70–90. "
+    "Если решение почти идеальное — 90–100. "
+    "Если решение явно неверное и не решает задачу — 0–40.\n\n"
+    "Ответь строго одним JSON-объектом без лишнего текста, в формате:\n"
+    "{\n"
+    '  "score": 0-100,\n'
+    '  "passed": true/false,\n'
+    '  "short_feedback": "краткий текст по-русски",\n'
+    '  "mistakes": ["список основных ошибок"]\n'
+    "}\n"
 )
 
 
@@ -38,27 +47,9 @@ async def llm_grade_answer(
     """
     # Select model based on eval mode
     if eval_mode == "llm_code":
-        model = "qwen3-coder-30b-a3b-instruct-fp8"
+        model = settings.CODER_MODEL
     else:
-        model = "qwen3-32b-awq"
-
-    # Build system prompt
-    system_prompt = (
-        "/no_think "
-        "Ты — автоматический проверяющий решений на техническом собеседовании. "
-        "Твоя задача — оценить решение кандидата по заданию, выставить балл от 0 до 100 "
-        "и кратко пояснить основные ошибки. "
-        "Если решение в целом верное, но есть небольшие недочёты — выставь 70–90. "
-        "Если решение почти идеальное — 90–100. "
-        "Если решение явно неверное и не решает задачу — 0–40.\n\n"
-        "Ответь строго одним JSON-объектом без лишнего текста, в формате:\n"
-        "{\n"
-        '  "score": 0-100,\n'
-        '  "passed": true/false,\n'
-        '  "short_feedback": "краткий текст по-русски",\n'
-        '  "mistakes": ["список основных ошибок"]\n'
-        "}\n"
-    )
+        model = settings.CHAT_MODEL
 
     # Build user prompt
     user_prompt_parts = [
@@ -76,20 +67,19 @@ async def llm_grade_answer(
 
     user_prompt = "\n".join(user_prompt_parts)
 
-    # Call LLM
+    # Call LLM through the shared async client: concurrent gradings overlap
+    # instead of blocking the event loop, and share its connection pool and RPS limit
     try:
-        resp = client.chat.completions.create(
-            model=model,
+        raw = await scibox_client.chat_completion(
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": GRADER_SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt},
             ],
+            model=model,
             max_tokens=256,
             temperature=0.1,
         )
-
-        raw = resp.choices[0].message.content
-        data = json.loads(raw)
+        data = loads_json(raw)
 
         return {
             "score": int(data.get("score", 0)),
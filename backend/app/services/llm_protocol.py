@@ -6,12 +6,13 @@ According to ТЗ (CR7M3NTAL1TY.MD):
 - System prompt tells model it's an INTERVIEWER, not a helpful assistant
 - Model should NEVER give full working code during active task
 """
-import json
+import asyncio
+import keyword
 import re
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, Awaitable, Callable, List, Literal, Tuple
 from enum import Enum
 
-from .scibox_client import scibox_client
+from .scibox_client import scibox_client, strip_think_blocks, loads_json, dumps_json
 from ..core.config import settings
 
 
@@ -28,6 +29,23 @@ class Intent(str, Enum):
     PARSE_VACANCY = "PARSE_VACANCY"
 
 
+# Sampling temperature per intent (0.7 for the rest). Extraction is near-deterministic
+TEMPERATURE_BY_INTENT = {
+    Intent.EVALUATE_ANSWER: 0.3,
+    Intent.CLASSIFY_AI_LIKE: 0.3,
+    Intent.PARSE_RESUME: 0.2,
+    Intent.PARSE_VACANCY: 0.2,
+}
+
+# Only low-temperature answers are a function of the request: identical requests of
+# these intents reuse the cached response, sampled ones always get a fresh answer
+CACHE_MAX_TEMPERATURE = 0.2
+CACHEABLE_INTENTS = frozenset(
+    intent for intent, temperature in TEMPERATURE_BY_INTENT.items()
+    if temperature <= CACHE_MAX_TEMPERATURE
+)
+
+
 class Stage(str, Enum):
     """Interview stages."""
     ALGO = "ALGO"
@@ -36,46 +54,40 @@ class Stage(str, Enum):
     META = "META"
 
 
-# System prompt for qwen3-32b-awq (universal chat model)
+# System prompt for qwen3-32b-awq (universal chat model). Kept short: it is prefilled
+# on every call; what each intent should do travels in context["rules"] (INTENT_RULES)
 INTERVIEWER_SYSTEM_PROMPT = """/no_think
-Ты ИИ-интервьюер платформы технических собеседований VibeCode.
-Ты НЕ обычный чат-бот и НЕ должен просто решать задачи за кандидата.
-
-Каждый запрос к тебе приходит в виде JSON в последнем сообщении пользователя.
-Твои правила:
-
-1. Сначала распарсь JSON.
-2. Посмотри поле "intent" и "stage".
-3. Выполни строго то, что требуется для этого intent.
-4. Отвечай ТОЛЬКО одним JSON-объектом без лишнего текста.
-
-intent:
-- "ASK_QUESTION": сгенерировать формулировку вопроса для кандидата.
-- "EVALUATE_ANSWER": оценить ответ кандидата относительно canonical_answer и key_points.
-- "GIVE_HINT": дать подсказку по задаче (без полного решения и рабочего кода).
-- "ANALYZE_BUG": объяснить, почему решение кандидата не проходит скрытые тесты, и дать направление исправления.
-- "EXPLAIN_SOLUTION": после завершения вопроса объяснить правильный подход (опционально с упрощённым примером).
-- "SMALL_TALK": поддержать лёгкий диалог без раскрытия ответов или решений задач.
-- "CLASSIFY_AI_LIKE": по куску кода оценить, насколько он похож на AI-сгенерированный (0..1).
-- "PARSE_RESUME": извлечь скиллы и примерный грейд из текста резюме.
-- "PARSE_VACANCY": извлечь скиллы и требования из описания вакансии.
-
-Особо важно:
-- В intent "ASK_QUESTION", "GIVE_HINT", "ANALYZE_BUG" и "SMALL_TALK" НИКОГДА не выдавай полный рабочий код решения задачи.
-- Полные решения можно описывать только в intent "EXPLAIN_SOLUTION" И ТОЛЬКО если в контексте указано, что задача уже завершена.
-
-Формат ответов:
-- ASK_QUESTION: {"question_text": "...", "short_intro": "..."}
-- EVALUATE_ANSWER: {"score": 0..3, "comment_for_interviewer": "...", "short_feedback_for_candidate": "...", "extra_topics": ["..."] }
-- GIVE_HINT: {"hint_level": "light|medium|heavy", "hint_text": "..."}
-- ANALYZE_BUG: {"analysis": "...", "suggested_focus": "..."}
-- EXPLAIN_SOLUTION: {"explanation": "..."}
-- SMALL_TALK: {"reply": "..."}
-- CLASSIFY_AI_LIKE: {"ai_style_score": 0.0..1.0, "signals": ["..."]}
-- PARSE_RESUME: {"proposed_grade": "...", "years_of_experience": number, "skills": [{"id": "...", "name": "...", "level": 0..3}], "tech_stack": ["..."], "summary": "..."}
-- PARSE_VACANCY: {"skills": [...], "critical_skills": [...], "weights": {...}}
+Ты ИИ-интервьюер VibeCode, а не чат-бот и не решатель задач за кандидата.
+В сообщении пользователя JSON-запрос: выполни то, что требует "intent" (правила в context.rules), и ответь ТОЛЬКО одним JSON-объектом.
+Полный рабочий код решения — только в EXPLAIN_SOLUTION для завершённой задачи.
+
+Форматы ответов:
+ASK_QUESTION: {"question_text": "...", "short_intro": "..."}
+EVALUATE_ANSWER: {"score": 0..3, "comment_for_interviewer": "...", "short_feedback_for_candidate": "...", "extra_topics": ["..."]}
+GIVE_HINT: {"hint_level": "light|medium|heavy", "hint_text": "..."}
+ANALYZE_BUG: {"analysis": "...", "suggested_focus": "..."}
+EXPLAIN_SOLUTION: {"explanation": "..."}
+SMALL_TALK: {"reply": "..."}
+CLASSIFY_AI_LIKE: {"ai_style_score": 0.0..1.0, "signals": ["..."]}
+PARSE_RESUME: {"proposed_grade": "...", "years_of_experience": number, "skills": [{"id": "...", "name": "...", "level": 0..3}], "tech_stack": ["..."], "summary": "..."}
+PARSE_VACANCY: {"skills": [...], "critical_skills": [...], "weights": {...}}
 """
 
+_NO_CODE_RULE = " Никогда не выдавай полный рабочий код решения задачи."
+
+# Per-intent instructions, sent only with requests of that intent
+INTENT_RULES = {
+    Intent.ASK_QUESTION: "Сгенерируй формулировку вопроса для кандидата." + _NO_CODE_RULE,
+    Intent.EVALUATE_ANSWER: "Оцени ответ кандидата относительно canonical_answer и key_points.",
+    Intent.GIVE_HINT: "Дай подсказку по задаче, без полного решения." + _NO_CODE_RULE,
+    Intent.ANALYZE_BUG: "Объясни, почему решение не проходит скрытые тесты, и дай направление исправления." + _NO_CODE_RULE,
+    Intent.EXPLAIN_SOLUTION: "Объясни правильный подход (можно с упрощённым примером). Полное решение — только если в контексте указано, что задача завершена.",
+    Intent.SMALL_TALK: "Поддержи лёгкий диалог, не раскрывая ответы и решения задач." + _NO_CODE_RULE,
+    Intent.CLASSIFY_AI_LIKE: "Оцени по коду, насколько он похож на AI-сгенерированный (0..1).",
+    Intent.PARSE_RESUME: "Извлеки скиллы и примерный грейд из текста резюме.",
+    Intent.PARSE_VACANCY: "Извлеки скиллы и требования из описания вакансии.",
+}
+
 # System prompt for qwen3-coder (code assistant) - used for bug analysis and AI detection
 CODER_SYSTEM_PROMPT = """/no_think
 Ты код-ассистент платформы технических собеседований VibeCode.
@@ -84,40 +96,162 @@ CODER_SYSTEM_PROMPT = """/no_think
 Отвечай ТОЛЬКО JSON без лишнего текста.
 """
 
+# Short, simple outputs: run on LIGHT_MODEL when one is configured
+LIGHT_INTENTS = frozenset({
+    Intent.SMALL_TALK,
+    Intent.PARSE_VACANCY,
+})
+
+# Output budget per intent, sized to the response schema plus Russian-text headroom
+# (decode time grows with every generated token; the old flat cap was 1024)
+MAX_TOKENS_BY_INTENT = {
+    Intent.ASK_QUESTION: 384,
+    Intent.EVALUATE_ANSWER: 512,
+    Intent.GIVE_HINT: 384,
+    Intent.ANALYZE_BUG: 512,
+    Intent.EXPLAIN_SOLUTION: 768,
+    Intent.SMALL_TALK: 256,
+    Intent.CLASSIFY_AI_LIKE: 192,
+    Intent.PARSE_RESUME: 1024,
+    Intent.PARSE_VACANCY: 768,
+}
+
+def _object_schema(**properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+    }
+
 
-def _clean_response(response: str) -> str:
-    """Remove <think> tags and extract JSON from response."""
-    # Remove think tags
-    response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL)
-    response = response.strip()
-    
-    # Try to extract JSON
-    if response.startswith('{'):
-        return response
-    
-    # Find JSON in response
-    json_match = re.search(r'\{[^{}]*\}', response, re.DOTALL)
-    if json_match:
-        return json_match.group()
+_STR = {"type": "string"}
+_STR_LIST = {"type": "array", "items": _STR}
+
+# Response schemas from the "Форматы ответов" section of INTERVIEWER_SYSTEM_PROMPT;
+# sent as response_format so the server decodes schema-valid JSON directly
+SCHEMA_BY_INTENT = {
+    Intent.ASK_QUESTION: _object_schema(question_text=_STR, short_intro=_STR),
+    Intent.EVALUATE_ANSWER: _object_schema(
+        score={"type": "integer", "minimum": 0, "maximum": 3},
+        comment_for_interviewer=_STR,
+        short_feedback_for_candidate=_STR,
+        extra_topics=_STR_LIST,
+    ),
+    Intent.GIVE_HINT: _object_schema(
+        hint_level={"type": "string", "enum": ["light", "medium", "heavy"]},
+        hint_text=_STR,
+    ),
+    Intent.ANALYZE_BUG: _object_schema(analysis=_STR, suggested_focus=_STR),
+    Intent.EXPLAIN_SOLUTION: _object_schema(explanation=_STR),
+    Intent.SMALL_TALK: _object_schema(reply=_STR),
+    Intent.CLASSIFY_AI_LIKE: _object_schema(
+        ai_style_score={"type": "number", "minimum": 0, "maximum": 1},
+        signals=_STR_LIST,
+    ),
+    Intent.PARSE_RESUME: _object_schema(
+        proposed_grade=_STR,
+        years_of_experience={"type": "number"},
+        skills={"type": "array", "items": _object_schema(
+            id=_STR, name=_STR, level={"type": "integer", "minimum": 0, "maximum": 3},
+        )},
+        tech_stack=_STR_LIST,
+        summary=_STR,
+    ),
+    Intent.PARSE_VACANCY: _object_schema(
+        skills={"type": "array"},
+        critical_skills={"type": "array"},
+        weights={"type": "object"},
+    ),
+}
+
+
+def _response_format(intent: Intent) -> Dict[str, Any]:
+    schema = SCHEMA_BY_INTENT.get(intent)
+    if schema is None:
+        return {"type": "json_object"}
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": intent.value.lower(), "schema": schema},
+    }
+
+
+# System messages are identical for every request; built once and shared (not mutated)
+_INTERVIEWER_SYSTEM_MESSAGE = {"role": "system", "content": INTERVIEWER_SYSTEM_PROMPT}
+_CODER_SYSTEM_MESSAGE = {"role": "system", "content": CODER_SYSTEM_PROMPT}
+
+
+# Characters that matter when looking for a JSON object; everything else is skipped in C
+_JSON_TOKEN_RE = re.compile(r'[{}"\\]')
+
+
+def _find_json_object(text: str, start: int = 0) -> Optional[Tuple[int, int]]:
+    """
+    Bounds of the first balanced {...} at or after start, in one pass.
+    Braces inside string literals are ignored. None if there is none.
+    """
+    begin = text.find('{', start)
+    if begin == -1:
+        return None
     
-    return response
+    depth = 0
+    in_string = False
+    skip_until = -1  # position right after an escaped character
+    for match in _JSON_TOKEN_RE.finditer(text, begin):
+        i = match.start()
+        if i < skip_until:
+            continue
+        ch = text[i]
+        if in_string:
+            if ch == '\\':
+                skip_until = i + 2
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return begin, i + 1
+    return None
+
+
+def _first_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """First {...} in text that parses as JSON, or None."""
+    bounds = _find_json_object(text)
+    while bounds is not None:
+        begin, end = bounds
+        try:
+            return loads_json(text[begin:end])
+        except ValueError:
+            # Balanced but not JSON (e.g. braces in prose): try the next object
+            bounds = _find_json_object(text, begin + 1)
+    return None
+
+
+def _json_complete(text: str) -> bool:
+    """stop_when for streamed responses: the answer object has fully arrived."""
+    if "<think>" in text and "</think>" not in text:
+        return False  # still reasoning
+    return _first_json_object(strip_think_blocks(text)) is not None
 
 
 def _parse_json_response(response: str) -> Dict[str, Any]:
-    """Parse JSON from LLM response."""
-    cleaned = _clean_response(response)
-    try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
-        # Try to find JSON object
-        start = cleaned.find('{')
-        end = cleaned.rfind('}') + 1
-        if start != -1 and end > start:
-            try:
-                return json.loads(cleaned[start:end])
-            except:
-                pass
+    """
+    Parse the first JSON object in an LLM response (think blocks removed).
+    With constrained decoding the response is the object itself; the scan is
+    for servers that ignore response_format.
+    """
+    result = _first_json_object(strip_think_blocks(response).strip())
+    if result is None:
         return {"error": "Failed to parse response", "raw": response[:500]}
+    return result
+
+
+# Caps intent calls in flight to SciBox. Held only around the client call itself,
+# so fan-outs nested inside other fan-outs cannot deadlock on it
+_llm_semaphore = asyncio.Semaphore(max(1, settings.LLM_CONCURRENCY))
 
 
 async def call_llm_with_intent(
@@ -144,6 +278,10 @@ async def call_llm_with_intent(
     Returns:
         Parsed JSON response from LLM
     """
+    rules = INTENT_RULES.get(intent)
+    if rules:
+        context = {**context, "rules": rules}
+    
     # Build the request payload
     payload = {
         "intent": intent.value,
@@ -155,23 +293,89 @@ async def call_llm_with_intent(
     }
     
     # Choose system prompt and model
-    system_prompt = CODER_SYSTEM_PROMPT if use_coder_model else INTERVIEWER_SYSTEM_PROMPT
-    model = settings.CODER_MODEL if use_coder_model else settings.CHAT_MODEL
+    system_message = _CODER_SYSTEM_MESSAGE if use_coder_model else _INTERVIEWER_SYSTEM_MESSAGE
+    if use_coder_model:
+        model = settings.CODER_MODEL
+    elif intent in LIGHT_INTENTS and settings.LIGHT_MODEL:
+        model = settings.LIGHT_MODEL
+    else:
+        model = settings.CHAT_MODEL
     
     # Make request
     messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)}
+        system_message,
+        {"role": "user", "content": dumps_json(payload)}
     ]
     
-    response = await scibox_client.chat_completion(
-        messages=messages,
-        model=model,
-        temperature=0.3 if intent in [Intent.EVALUATE_ANSWER, Intent.CLASSIFY_AI_LIKE] else 0.7,
-        max_tokens=1024
-    )
+    temperature = TEMPERATURE_BY_INTENT.get(intent, 0.7)
+    max_tokens = MAX_TOKENS_BY_INTENT.get(intent, 1024)
+    response_format = _response_format(intent)
+    
+    if intent not in CACHEABLE_INTENTS:
+        async with _llm_semaphore:
+            response = await scibox_client.chat_completion(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stop_when=_json_complete,
+                response_format=response_format
+            )
+        return _parse_json_response(response)
+    
+    async with _llm_semaphore:
+        response = await scibox_client.cached_chat_completion(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stop_when=_json_complete,
+            response_format=response_format
+        )
+    result = _parse_json_response(response)
+    if "error" in result:
+        # Do not serve the same broken answer to a retry
+        scibox_client.evict_cached_response(messages, temperature, max_tokens, model, response_format)
+    return result
+
+
+async def gather_intents(calls: List[Awaitable[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Run independent LLM calls concurrently (each client call still waits for a
+    slot of _llm_semaphore). Results keep the order of calls; a call that raised
+    gives {"error": "..."}. Cancellation is propagated, not turned into a result.
+    """
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException) and not isinstance(result, Exception):
+            raise result  # CancelledError, KeyboardInterrupt
+    return [
+        {"error": str(result)} if isinstance(result, Exception) else result
+        for result in results
+    ]
+
+
+async def warm_up_prefix_cache() -> None:
+    """
+    Send each static system message once with a 1-token budget so the server's
+    prefix cache already holds it when real requests arrive.
+    """
+    pairs = {
+        (settings.CHAT_MODEL, "interviewer"): _INTERVIEWER_SYSTEM_MESSAGE,
+        (settings.CODER_MODEL, "coder"): _CODER_SYSTEM_MESSAGE,
+    }
+    if settings.LIGHT_MODEL:
+        pairs[(settings.LIGHT_MODEL, "interviewer")] = _INTERVIEWER_SYSTEM_MESSAGE
     
-    return _parse_json_response(response)
+    await asyncio.gather(*(
+        scibox_client.chat_completion(
+            messages=[system_message, {"role": "user", "content": "{}"}],
+            model=model,
+            temperature=0.0,
+            max_tokens=1
+        )
+        for (model, _), system_message in pairs.items()
+    ))
 
 
 # ============ Convenience Functions ============
@@ -331,13 +535,75 @@ async def analyze_bug(
     )
 
 
+# Cheap pre-filter for classify_ai_like: clear-cut code is scored without the LLM
+_LLM_PHRASE_RE = re.compile(
+    r"here'?s (a|an|the|my)\b|note that|this (function|solution|approach|code) "
+    r"(uses|returns|implements|iterates|checks)|step \d+\s*:|example usage|"
+    r"edge cases?:|time complexity\s*:|space complexity\s*:",
+    re.IGNORECASE
+)
+_MAIN_GUARD_RE = re.compile(r'^if __name__ == ["\']__main__["\']\s*:', re.MULTILINE)
+_DEF_RE = re.compile(r'^\s*def \w+\((.*?)\)\s*(->[^:]+)?:', re.MULTILINE)
+_IDENTIFIER_RE = re.compile(r'\b[A-Za-z_]\w*\b')
+_KEYWORDS = frozenset(keyword.kwlist)
+
+
+def _heuristic_ai_style(code: str) -> Optional[Dict[str, Any]]:
+    """
+    Score obviously AI-styled or obviously hand-written code without the LLM.
+    None when the code is borderline and needs the model.
+    """
+    lines = [line.strip() for line in code.splitlines() if line.strip()]
+    if not lines:
+        return {"ai_style_score": 0.0, "signals": [], "source": "heuristic"}
+    
+    comment_lines = sum(1 for line in lines if line.startswith("#"))
+    has_docstring = '"""' in code or "'''" in code
+    defs = _DEF_RE.findall(code)
+    annotated = bool(defs) and all(ret and (":" in params or not params) for params, ret in defs)
+    
+    score = 0.0
+    signals = []
+    if _LLM_PHRASE_RE.search(code):
+        score += 0.6
+        signals.append("Типичные для LLM фразы в комментариях")
+    if _MAIN_GUARD_RE.search(code):
+        score += 0.15
+        signals.append("Блок с примером использования")
+    if comment_lines / len(lines) >= 0.25:
+        score += 0.2
+        signals.append("Высокая плотность комментариев")
+    if has_docstring and annotated:
+        score += 0.2
+        signals.append("Докстринги и аннотации типов во всех функциях")
+    if code.count("except Exception") >= 2:
+        score += 0.1
+        signals.append("Обработка исключений «на всякий случай»")
+    
+    if score >= 0.9:
+        return {"ai_style_score": min(score, 1.0), "signals": signals, "source": "heuristic"}
+    if score > 0 or has_docstring or any(ret for _, ret in defs):
+        return None
+    
+    # No comments, docstrings or annotations: terse hand-written style if names are short too
+    identifiers = [name for name in _IDENTIFIER_RE.findall(code) if name not in _KEYWORDS]
+    if identifiers and sum(map(len, identifiers)) / len(identifiers) < 4:
+        return {"ai_style_score": 0.05, "signals": [], "source": "heuristic"}
+    return None
+
+
 async def classify_ai_like(code: str) -> Dict[str, Any]:
     """
     Classify if code looks AI-generated.
+    Clear-cut cases are scored by _heuristic_ai_style, the rest by the coder model.
     
     Returns:
         {"ai_style_score": 0.0..1.0, "signals": ["..."]}
     """
+    heuristic = _heuristic_ai_style(code)
+    if heuristic is not None:
+        return heuristic
+    
     context = {
         "code": code
     }
@@ -352,6 +618,128 @@ async def classify_ai_like(code: str) -> Dict[str, Any]:
     )
 
 
+# Longer resumes/vacancies are split and parsed chunk by chunk (in parallel through
+# gather_intents); PARSE_* responses are cached per chunk by cached_chat_completion
+PARSE_CHUNK_CHARS = 4000
+
+_SECTION_SPLIT_RE = re.compile(
+    r'\n(?=[ \t]*(?:Опыт|Навыки|Образование|Проекты|Experience|Skills|Education|Projects)\b)',
+    re.IGNORECASE
+)
+_PARAGRAPH_SPLIT_RE = re.compile(r'\n[ \t]*\n')
+_GRADE_ORDER = {"intern": 0, "junior": 1, "middle": 2, "senior": 3, "lead": 4}
+
+
+def _split_for_parsing(text: str, limit: int = PARSE_CHUNK_CHARS) -> List[str]:
+    """Split text into chunks of at most limit chars on section headers, then paragraphs."""
+    if len(text) <= limit:
+        return [text]
+    
+    pieces: List[str] = []
+    for section in _SECTION_SPLIT_RE.split(text):
+        if len(section) <= limit:
+            pieces.append(section)
+            continue
+        for paragraph in _PARAGRAPH_SPLIT_RE.split(section):
+            # A single paragraph over the limit is cut as is
+            pieces.extend(paragraph[i:i + limit] for i in range(0, len(paragraph), limit))
+    
+    # Pack neighbouring pieces back together up to the limit
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        if current and len(current) + len(piece) + 2 > limit:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _union(lists: List[List[Any]]) -> List[Any]:
+    """Concatenate lists dropping duplicates (dicts compared by content), order kept."""
+    seen = set()
+    merged = []
+    for items in lists:
+        for item in items or []:
+            key = item if isinstance(item, str) else dumps_json(item)
+            if key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return merged
+
+
+def _merge_resume_parts(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    skills: Dict[str, Dict[str, Any]] = {}
+    for part in parts:
+        for skill in part.get("skills") or []:
+            if not isinstance(skill, dict):
+                continue
+            key = str(skill.get("id") or skill.get("name", "")).lower()
+            known = skills.get(key)
+            if known is None or (skill.get("level") or 0) > (known.get("level") or 0):
+                skills[key] = skill
+    
+    grades = [part.get("proposed_grade") for part in parts if part.get("proposed_grade")]
+    years = [
+        part["years_of_experience"] for part in parts
+        if isinstance(part.get("years_of_experience"), (int, float))
+    ]
+    return {
+        "proposed_grade": max(grades, key=lambda g: _GRADE_ORDER.get(str(g).lower(), 0)) if grades else None,
+        # Max, not sum: the total is usually stated once, next to a job list in another chunk
+        "years_of_experience": max(years) if years else 0,
+        "skills": list(skills.values()),
+        "tech_stack": _union([part.get("tech_stack") for part in parts]),
+        "summary": " ".join(part["summary"] for part in parts if part.get("summary")),
+    }
+
+
+def _merge_vacancy_parts(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    weights: Dict[str, Any] = {}
+    for part in parts:
+        for skill, weight in (part.get("weights") or {}).items():
+            if isinstance(weight, (int, float)) and weight > weights.get(skill, float("-inf")):
+                weights[skill] = weight
+    return {
+        "skills": _union([part.get("skills") for part in parts]),
+        "critical_skills": _union([part.get("critical_skills") for part in parts]),
+        "weights": weights,
+    }
+
+
+async def _parse_in_chunks(
+    intent: Intent,
+    text_key: str,
+    text: str,
+    merge: Callable[[List[Dict[str, Any]]], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Run a PARSE_* intent over text, per chunk when it is long, and merge the results."""
+    chunks = _split_for_parsing(text)
+    results = await gather_intents([
+        call_llm_with_intent(
+            intent=intent,
+            stage=Stage.META,
+            direction="any",
+            difficulty="any",
+            context={text_key: chunk}
+        )
+        for chunk in chunks
+    ])
+    if len(results) == 1:
+        return results[0]
+    
+    parts = [result for result in results if "error" not in result]
+    if not parts:
+        return results[0]
+    return merge(parts)
+
+
 async def parse_resume(resume_text: str) -> Dict[str, Any]:
     """
     Parse resume and extract skills, grade, experience.
@@ -365,17 +753,7 @@ async def parse_resume(resume_text: str) -> Dict[str, Any]:
             "summary": "..."
         }
     """
-    context = {
-        "resume_text": resume_text
-    }
-    
-    return await call_llm_with_intent(
-        intent=Intent.PARSE_RESUME,
-        stage=Stage.META,
-        direction="any",
-        difficulty="any",
-        context=context
-    )
+    return await _parse_in_chunks(Intent.PARSE_RESUME, "resume_text", resume_text, _merge_resume_parts)
 
 
 async def parse_vacancy(vacancy_text: str) -> Dict[str, Any]:
@@ -389,17 +767,7 @@ async def parse_vacancy(vacancy_text: str) -> Dict[str, Any]:
             "weights": {...}
         }
     """
-    context = {
-        "vacancy_text": vacancy_text
-    }
-    
-    return await call_llm_with_intent(
-        intent=Intent.PARSE_VACANCY,
-        stage=Stage.META,
-        direction="any",
-        difficulty="any",
-        context=context
-    )
+    return await _parse_in_chunks(Intent.PARSE_VACANCY, "vacancy_text", vacancy_text, _merge_vacancy_parts)
 
 
 async def explain_solution(
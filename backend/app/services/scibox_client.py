@@ -2,14 +2,24 @@
 SciBox LLM API Client - ASYNC VERSION with KILLER PROMPTS
 Wrapper for interacting with SciBox models using OpenAI-compatible API.
 """
-from openai import AsyncOpenAI
-from typing import List, Dict, Any, Optional
+from openai import (
+    AsyncOpenAI, APIConnectionError, BadRequestError, InternalServerError, RateLimitError
+)
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, Optional, Tuple, Union
 import asyncio
+import hashlib
 import time
 import json
 import re
 
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used without it
+    orjson = None
+
 from ..core.config import settings
+from .http_client import shared_http
 from .prompts import (
     RESUME_ANALYSIS_SYSTEM, RESUME_ANALYSIS_USER,
     INTERVIEWER_CHAT_SYSTEM, INTERVIEWER_CHAT_USER,
@@ -28,13 +38,99 @@ from ..prompts.task_selection_explainer import (
 )
 
 
+_THINK_BLOCK_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
+_THINK_TAG_RE = re.compile(r'</?think[^>]*>')
+_THINK_TAIL_RE = re.compile(r'<think>.*$', re.DOTALL)
+_JSON_OBJECT_RE = re.compile(r'\{[\s\S]*\}')
+
+
+def loads_json(text: Union[str, bytes]) -> Any:
+    """json.loads through orjson when installed; stdlib json handles what orjson rejects."""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def dumps_json(obj: Any) -> str:
+    """
+    Compact non-ASCII-preserving JSON for prompts, via orjson when installed.
+    The stdlib fallback uses the same separators, so prompts do not depend on it.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:  # non-str keys, ints beyond 64 bits
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+# Failures that mean SciBox itself is unwell (timeouts are APIConnectionError too)
+_TRANSIENT_ERRORS = (APIConnectionError, InternalServerError, RateLimitError)
+
+
+class _CircuitBreaker:
+    """
+    Opens after fail_max transient failures in a row; while open, calls are refused
+    so requests fail fast instead of queueing behind an outage. After reset_timeout
+    calls go through again and the next failure reopens it.
+    """
+    
+    def __init__(self, fail_max: int, reset_timeout: float):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+    
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return False
+        # Half-open: one more failure is enough to open again
+        self._opened_at = None
+        self._failures = self.fail_max - 1
+        return True
+    
+    def record(self, error: Optional[BaseException]) -> None:
+        if error is None:
+            self._failures = 0
+        elif isinstance(error, _TRANSIENT_ERRORS):
+            self._failures += 1
+            if self._failures >= self.fail_max and self._opened_at is None:
+                self._opened_at = time.monotonic()
+                print(f"⚠️ SciBox unavailable ({self._failures} failed requests), "
+                      f"failing fast for {self.reset_timeout:.0f}s")
+
+
+def strip_think_blocks(text: str) -> str:
+    """Remove <think>...</think> blocks; skips the regex when there are none."""
+    if "<think>" not in text:
+        return text
+    return _THINK_BLOCK_RE.sub('', text)
+
+
+def strip_think_tags(text: str) -> str:
+    """strip_think_blocks plus stray <think>/</think> tags, whitespace-stripped."""
+    if not text:
+        return text
+    if "think" not in text:
+        return text.strip()
+    return _THINK_TAG_RE.sub('', _THINK_BLOCK_RE.sub('', text)).strip()
+
+
 class SciBoxClient:
     """Client for SciBox LLM API with async rate limiting support."""
     
     def __init__(self):
         self.client = AsyncOpenAI(
             api_key=settings.SCIBOX_API_KEY,
-            base_url=settings.SCIBOX_BASE_URL
+            base_url=settings.SCIBOX_BASE_URL,
+            timeout=settings.LLM_TIMEOUT_S,
+            max_retries=settings.LLM_MAX_RETRIES,
+            http_client=shared_http
         )
         self.chat_model = settings.CHAT_MODEL
         self.coder_model = settings.CODER_MODEL
@@ -51,18 +147,28 @@ class SciBoxClient:
         self._chat_interval = 1.0 / settings.CHAT_MODEL_RPS
         self._coder_interval = 1.0 / settings.CODER_MODEL_RPS
         self._embedding_interval = 1.0 / settings.EMBEDDING_MODEL_RPS
+        
+        # cached_chat_completion: prompt hash -> (time stored, response)
+        self._response_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        
+        # model -> response_format types the server turned down; not sent again
+        self._rejected_response_formats: Dict[str, set] = {}
+        
+        self._breaker = _CircuitBreaker(settings.LLM_BREAKER_FAIL_MAX, settings.LLM_BREAKER_RESET_S)
     
     def _clean_think_tags(self, text: str) -> str:
         """Remove <think> tags and ALL internal reasoning from response."""
         if not text:
             return text
-        # Remove <think>...</think> blocks (greedy and non-greedy)
-        text = re.sub(r'<think>[\s\S]*?</think>', '', text, flags=re.DOTALL).strip()
-        text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL).strip()
+        if "think" not in text:
+            # No tags at all (the usual case with /no_think)
+            return text.strip()
+        # Remove <think>...</think> blocks
+        text = _THINK_BLOCK_RE.sub('', text).strip()
         # Remove partial or malformed tags
-        text = re.sub(r'</?think[^>]*>', '', text).strip()
+        text = _THINK_TAG_RE.sub('', text).strip()
         # Remove any remaining <think> without closing
-        text = re.sub(r'<think>[\s\S]*$', '', text, flags=re.DOTALL).strip()
+        text = _THINK_TAIL_RE.sub('', text).strip()
         return text
     
     async def _rate_limit(self, last_request_time: float, interval: float) -> None:
@@ -71,32 +177,179 @@ class SciBoxClient:
         if elapsed < interval:
             await asyncio.sleep(interval - elapsed)
     
+    async def _create_completion(self, response_format: Optional[Dict[str, Any]], **kwargs):
+        """chat.completions.create (see _create_with_format) reporting to the circuit breaker."""
+        try:
+            response = await self._create_with_format(response_format, **kwargs)
+        except Exception as e:
+            self._breaker.record(e)
+            raise
+        self._breaker.record(None)
+        return response
+    
+    async def _create_with_format(self, response_format: Optional[Dict[str, Any]], **kwargs):
+        """
+        chat.completions.create with constrained decoding when the server supports it.
+        If the request with response_format is rejected (any 400), it is retried once
+        without it; when that succeeds, the format type is remembered as unsupported
+        for the model and later calls skip it (json_schema falls back to json_object).
+        """
+        rejected = self._rejected_response_formats.setdefault(kwargs["model"], set())
+        if response_format is not None and response_format["type"] in rejected:
+            response_format = {"type": "json_object"} if response_format["type"] == "json_schema" else None
+            if response_format is not None and response_format["type"] in rejected:
+                response_format = None
+        if response_format is None:
+            return await self.client.chat.completions.create(**kwargs)
+        
+        try:
+            return await self.client.chat.completions.create(response_format=response_format, **kwargs)
+        except BadRequestError as e:
+            print(f"⚠️ Request with response_format {response_format['type']} rejected, retrying without it: {e}")
+        response = await self.client.chat.completions.create(**kwargs)
+        # Only now is it clear that the format, not the request, was the problem
+        rejected.add(response_format["type"])
+        return response
+    
+    # The locks below only space out request starts; the requests themselves
+    # run concurrently, so asyncio.gather over several calls overlaps their latency
+    
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
         max_tokens: int = 512,
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        stop_when: Optional[Callable[[str], bool]] = None,
+        response_format: Optional[Dict[str, Any]] = None
     ) -> str:
-        """Send chat completion request (async). Auto-cleans <think> tags."""
+        """
+        Send chat completion request (async). Auto-cleans <think> tags.
+        With stop_when the response is streamed and reading stops (the stream is
+        closed, so the server stops decoding) once stop_when(text so far) is true.
+        response_format ({"type": "json_schema", ...} or {"type": "json_object"})
+        constrains decoding to JSON where the server supports it.
+        Returns "" at once while the circuit breaker is open.
+        """
+        if not self._breaker.allow():
+            return ""
+        
         async with self._chat_lock:
             await self._rate_limit(self._last_chat_request, self._chat_interval)
             self._last_chat_request = time.time()
-            
+        
+        if stop_when is not None:
+            return await self._stream_completion(messages, temperature, max_tokens, model, stop_when, response_format)
+        
+        try:
+            response = await self._create_completion(
+                response_format,
+                model=model or self.chat_model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            content = response.choices[0].message.content or ""
+            # ALWAYS clean think tags from ALL responses
+            content = self._clean_think_tags(content)
+            return content
+        except Exception as e:
+            print(f"⚠️ Chat completion error: {e}")
+            return ""
+    
+    async def _stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        model: Optional[str],
+        stop_when: Callable[[str], bool],
+        response_format: Optional[Dict[str, Any]]
+    ) -> str:
+        parts: List[str] = []
+        try:
+            stream = await self._create_completion(
+                response_format,
+                model=model or self.chat_model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
             try:
-                response = await self.client.chat.completions.create(
-                    model=model or self.chat_model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-                content = response.choices[0].message.content or ""
-                # ALWAYS clean think tags from ALL responses
-                content = self._clean_think_tags(content)
-                return content
-            except Exception as e:
-                print(f"⚠️ Chat completion error: {e}")
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    # A JSON answer can only become complete on a closing brace
+                    if "}" in delta and stop_when("".join(parts)):
+                        break
+            finally:
+                await stream.close()
+        except Exception as e:
+            print(f"⚠️ Chat completion error: {e}")
+            if not parts:
                 return ""
+        
+        return self._clean_think_tags("".join(parts))
+    
+    async def cached_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+        model: Optional[str] = None,
+        stop_when: Optional[Callable[[str], bool]] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        chat_completion memoized by a hash of the whole request for LLM_CACHE_TTL_S.
+        Empty (failed) responses are not cached.
+        """
+        if settings.LLM_CACHE_SIZE <= 0 or settings.LLM_CACHE_TTL_S <= 0:
+            return await self.chat_completion(messages, temperature, max_tokens, model, stop_when, response_format)
+        
+        key = self._response_cache_key(messages, temperature, max_tokens, model, response_format)
+        entry = self._response_cache.get(key)
+        if entry is not None:
+            stored_at, content = entry
+            if time.monotonic() - stored_at < settings.LLM_CACHE_TTL_S:
+                self._response_cache.move_to_end(key)
+                return content
+            del self._response_cache[key]
+        
+        content = await self.chat_completion(messages, temperature, max_tokens, model, stop_when, response_format)
+        if content:
+            self._response_cache[key] = (time.monotonic(), content)
+            while len(self._response_cache) > settings.LLM_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+        return content
+    
+    def evict_cached_response(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+        model: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Drop a cached response the caller could not use (e.g. unparsable JSON)."""
+        key = self._response_cache_key(messages, temperature, max_tokens, model, response_format)
+        self._response_cache.pop(key, None)
+    
+    def _response_cache_key(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        model: Optional[str],
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> str:
+        payload = dumps_json([model or self.chat_model, temperature, max_tokens, response_format, messages])
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
     
     async def code_completion(
         self,
@@ -105,37 +358,47 @@ class SciBoxClient:
         max_tokens: int = 1024
     ) -> str:
         """Send code completion request (async)."""
+        if not self._breaker.allow():
+            return ""
+        
         async with self._coder_lock:
             await self._rate_limit(self._last_coder_request, self._coder_interval)
             self._last_coder_request = time.time()
-            
-            try:
-                response = await self.client.chat.completions.create(
-                    model=self.coder_model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-                return response.choices[0].message.content
-            except Exception as e:
-                print(f"⚠️ Code completion error: {e}")
-                return ""
+        
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.coder_model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            self._breaker.record(None)
+            return response.choices[0].message.content
+        except Exception as e:
+            self._breaker.record(e)
+            print(f"⚠️ Code completion error: {e}")
+            return ""
     
     async def get_embedding(self, text: str) -> List[float]:
         """Get embedding for text using bge-m3 model (async)."""
+        if not self._breaker.allow():
+            return []
+        
         async with self._embedding_lock:
             await self._rate_limit(self._last_embedding_request, self._embedding_interval)
             self._last_embedding_request = time.time()
-            
-            try:
-                response = await self.client.embeddings.create(
-                    model=self.embedding_model,
-                    input=text
-                )
-                return response.data[0].embedding
-            except Exception as e:
-                print(f"⚠️ Embedding error: {e}")
-                return []
+        
+        try:
+            response = await self.client.embeddings.create(
+                model=self.embedding_model,
+                input=text
+            )
+            self._breaker.record(None)
+            return response.data[0].embedding
+        except Exception as e:
+            self._breaker.record(e)
+            print(f"⚠️ Embedding error: {e}")
+            return []
     
     def _parse_json_response(self, response: str, fallback: Dict[str, Any]) -> Dict[str, Any]:
         """Helper to parse JSON from LLM response with robust handling."""
@@ -147,7 +410,7 @@ class SciBoxClient:
             response = response.strip()
             
             # Remove <think> tags if present (qwen3 thinking mode)
-            response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL).strip()
+            response = strip_think_blocks(response).strip()
             
             # Remove markdown code blocks
             if "```json" in response:
@@ -165,11 +428,11 @@ class SciBoxClient:
             
             # Try to find JSON object in response
             if not response.startswith("{"):
-                json_match = re.search(r'\{[\s\S]*\}', response)
+                json_match = _JSON_OBJECT_RE.search(response)
                 if json_match:
                     response = json_match.group()
             
-            parsed = json.loads(response)
+            parsed = loads_json(response)
             print(f"✅ Successfully parsed JSON response")
             return parsed
             
@@ -571,7 +834,7 @@ class SciBoxClient:
         
         # Clean response
         if response:
-            response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL).strip()
+            response = strip_think_blocks(response).strip()
             response = response.strip('"').strip("'")
         
         if not response: